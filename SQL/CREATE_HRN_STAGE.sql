@@ -0,0 +1,12 @@
+IF OBJECT_ID('tempdb..#HRN_STAGE') IS NOT NULL DROP TABLE #HRN_STAGE;
+CREATE TABLE #HRN_STAGE (
+    RN INT NOT NULL,
+    PID INT NOT NULL,
+    GR SMALLINT NULL,
+    SR VARCHAR(10) NULL,
+    SL VARCHAR(10) NULL,
+    PF VARCHAR(10) NULL,
+    TD DATETIME NULL,
+    SCL SMALLINT NULL,
+    [IN] VARCHAR(10) NULL
+)
\ No newline at end of file
@@ -0,0 +1,30 @@
+-- Single round trip per record: inserts nothing when HRN already has this PID and TD,
+-- otherwise numbers SQ from the student's current MAX(SQ) and returns it.
+-- UPDLOCK/HOLDLOCK stop a concurrent upload from reading the same MAX(SQ) before this commits.
+INSERT INTO HRN (
+    PID,
+    SQ,
+    GR,
+    SR,
+    SL,
+    PF,
+    TD,
+    SCL,
+    [IN]
+)
+OUTPUT inserted.SQ
+SELECT
+    :PID,
+    ISNULL(MAX(h.SQ), 0) + 1,
+    :GR,
+    :SR,
+    :SL,
+    :PF,
+    :TD,
+    :SCL,
+    :IN
+FROM HRN h WITH (UPDLOCK, HOLDLOCK)
+WHERE h.PID = :PID
+HAVING NOT EXISTS (
+    SELECT 1 FROM HRN d WHERE d.PID = :PID AND d.TD = :TD
+)
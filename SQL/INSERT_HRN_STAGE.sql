@@ -0,0 +1,21 @@
+INSERT INTO #HRN_STAGE (
+    RN,
+    PID,
+    GR,
+    SR,
+    SL,
+    PF,
+    TD,
+    SCL,
+    [IN]
+) VALUES (
+    :RN,
+    :PID,
+    :GR,
+    :SR,
+    :SL,
+    :PF,
+    :TD,
+    :SCL,
+    :IN
+)
@@ -0,0 +1,43 @@
+-- Inserts every staged row that is not already in HRN for the same PID and TD.
+-- SQ continues from each student's current MAX(SQ) in staging (RN) order, and a
+-- (PID, TD) pair staged more than once is only inserted for its first row.
+-- Returns one row per inserted record; .rowcount is -1 under SET NOCOUNT ON.
+WITH NEW_ROWS AS (
+    SELECT
+        s.*,
+        ROW_NUMBER() OVER (PARTITION BY s.PID, s.TD ORDER BY s.RN) AS DUP_RN
+    FROM #HRN_STAGE s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM HRN h WHERE h.PID = s.PID AND h.TD = s.TD
+    )
+)
+INSERT INTO HRN (
+    PID,
+    SQ,
+    GR,
+    SR,
+    SL,
+    PF,
+    TD,
+    SCL,
+    [IN]
+)
+OUTPUT inserted.PID
+SELECT
+    n.PID,
+    ISNULL(m.MAX_SQ, 0) + ROW_NUMBER() OVER (PARTITION BY n.PID ORDER BY n.RN),
+    n.GR,
+    n.SR,
+    n.SL,
+    n.PF,
+    n.TD,
+    n.SCL,
+    n.[IN]
+FROM NEW_ROWS n
+LEFT JOIN (
+    SELECT h.PID, MAX(h.SQ) AS MAX_SQ
+    FROM HRN h WITH (UPDLOCK, HOLDLOCK)
+    WHERE h.PID IN (SELECT PID FROM #HRN_STAGE)
+    GROUP BY h.PID
+) m ON m.PID = n.PID
+WHERE n.DUP_RN = 1
@@ -0,0 +1,74 @@
+"""
+Times grade normalization: the previous per-value convert_grade_to_int applied
+with Series.apply (one log call per bad value) against the vectorized
+normalize_grades.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_grade_normalization --rows 1000 10000 100000 --bad 0.01
+"""
+import argparse
+import random
+import time
+
+from pandas import Series, notna
+
+from main_4RHearing_upload import normalize_grades
+
+GRADE_SPELLINGS = ['K', 'TK', 'T-K', 'PS', '1', '2', '3', '4', '5', '6.0', 7, 8, ' k ', None]
+BAD_SPELLINGS = ['x', 'N/A', '?', 'Kinder']
+
+def convert_grade_to_int(grade, warnings: list):
+    """The previous per-value converter; warnings are collected instead of logged."""
+    if not notna(grade) or grade is None:
+        return None
+    grade_str = str(grade).strip().upper()
+    if grade_str == 'K':
+        return 0
+    if grade_str in ['TK', 'T-K', 'T K']:
+        return -1
+    if grade_str in ['PS', 'P-S', 'P S', 'PRESCHOOL']:
+        return -2
+    try:
+        return int(float(grade_str))
+    except (ValueError, TypeError):
+        warnings.append(f"WARNING: Could not convert grade '{grade}' to integer, returning None")
+        return None
+
+def synthetic_grades(rows: int, bad_fraction: float, seed: int = 0) -> Series:
+    """Raw roster grades mixing numbers, text, aliases, blanks and a share of bad values."""
+    rng = random.Random(seed)
+    return Series([
+        rng.choice(BAD_SPELLINGS) if rng.random() < bad_fraction else rng.choice(GRADE_SPELLINGS)
+        for _ in range(rows)
+    ], dtype=object)
+
+def best_of(repeat: int, func):
+    """Best-of-`repeat` wall time of func(), plus its last result."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--bad', type=float, default=0.01, help='Fraction of unparseable grades')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'apply ms':>12}{'vectorized ms':>15}{'speedup':>9}")
+    for rows in args.rows:
+        grades = synthetic_grades(rows, args.bad)
+        apply_seconds, applied = best_of(args.repeat, lambda: grades.apply(convert_grade_to_int, args=([],)))
+        vector_seconds, vectorized = best_of(args.repeat, lambda: normalize_grades(grades))
+
+        assert applied.astype('Int8').equals(vectorized)
+        print(f"{rows:>8}{apply_seconds * 1000:>12.2f}{vector_seconds * 1000:>15.2f}"
+              f"{apply_seconds / vector_seconds:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
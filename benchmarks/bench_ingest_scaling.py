@@ -0,0 +1,70 @@
+"""
+Shows how combining per-file roster frames scales with the number of input files:
+the old accumulate-in-the-loop concat (quadratic) against combine_roster_frames
+(one concat at the end).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingest_scaling --files 10 50 100 250 500 --rows 300
+"""
+import argparse
+import time
+from datetime import datetime
+
+from pandas import DataFrame, concat
+
+from main_4RHearing_upload import combine_roster_frames
+
+def synthetic_file_frame(rows: int, file_number: int) -> DataFrame:
+    """A standardized per-file frame shaped like load_roster_file's output."""
+    return DataFrame({
+        'Status': ['P', 'NP', 'P', 'Abs'] * (rows // 4) + ['P'] * (rows % 4),
+        'Last_Name': 'Garcia',
+        'First_Name': 'Ana',
+        'Seat_Number': range(rows),
+        'Student_ID': range(file_number * rows, (file_number + 1) * rows),
+        'Grade': 'K',
+        'Gender': 'F',
+        'DOB': datetime(2015, 1, 1),
+        'Teacher_Name': 'Clark',
+        'SPED': 'N',
+        'Sheet_Name': 'Clark (K)',
+        'SC': 2,
+        'File_Date': datetime(2025, 10, 17),
+        'Nurse': 'Kristin Jagoda',
+        'School_Name': f"School{file_number}",
+        'Initials': 'KJ',
+        'Source_File': f"School{file_number} Rosters 4RHearing.xlsx",
+    })
+
+def accumulate_in_loop(frames) -> DataFrame:
+    """The previous main() pattern: concat onto the running total once per file."""
+    data = DataFrame()
+    for _, temp_df in frames:
+        data = concat([data, temp_df], ignore_index=True)
+    return data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, nargs='+', default=[10, 50, 100, 250, 500])
+    parser.add_argument('--rows', type=int, default=300)
+    args = parser.parse_args()
+    
+    print(f"{'files':>6}{'loop concat s':>15}{'per file ms':>13}{'single concat s':>17}{'per file ms':>13}")
+    for n_files in args.files:
+        frames = [(f"file{i}.xlsx", synthetic_file_frame(args.rows, i)) for i in range(n_files)]
+        
+        start = time.perf_counter()
+        looped = accumulate_in_loop(frames)
+        looped_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        combined, _ = combine_roster_frames(iter(frames))
+        combined_seconds = time.perf_counter() - start
+        
+        assert len(looped) == len(combined) == n_files * args.rows
+        print(f"{n_files:>6}{looped_seconds:>15.3f}{looped_seconds / n_files * 1000:>13.2f}"
+              f"{combined_seconds:>17.3f}{combined_seconds / n_files * 1000:>13.2f}")
+
+if __name__ == '__main__':
+    main()
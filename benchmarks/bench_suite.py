@@ -0,0 +1,171 @@
+"""
+End-to-end benchmark at multiples of one district run (10 workbooks, ~3,200 rows):
+writes synthetic ELEMENTARY and MIDDLE workbooks, times ingestion, normalization
+and each upload mode against the local SQLite stand-in (local_db), and saves the
+results as JSON.
+
+Only the portable upload modes are timed; 'merge' and 'atomic' use T-SQL
+(#temp tables, OUTPUT, lock hints) that SQLite cannot run.
+
+With --latency-ms/--jitter-ms every statement, batch and commit on the stand-in
+waits as if it crossed the network (see local_db.LatencyConnection). Production
+runs took 60-85 ms per row at roughly five round trips per row, i.e. about
+12-17 ms per round trip.
+
+Run from the repository root (the workbook reader follows EXCEL_ENGINE):
+
+    python -m benchmarks.bench_suite --scales 1 10 100 --output bench_results.json
+    python -m benchmarks.bench_suite --scales 1 --latency-ms 15 --jitter-ms 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+
+import pandas
+
+import local_db
+import main_4RHearing_upload
+from benchmarks.synthetic import DISTRICT_ROWS, DISTRICT_SHEETS, write_district
+from instrumentation import probe, timer
+from main_4RHearing_upload import (UploadCounts, combine_roster_frames, iter_roster_frames, upload_data,
+                                   upload_rows_async)
+
+# Upload strategies by name: upload_data keyword arguments, or None for the async loader
+UPLOAD_MODES = {
+    'row': dict(upload_mode='row'),
+    'batch': dict(upload_mode='batch'),
+    'threaded': dict(upload_mode='row', workers=4),
+    'async': None,
+}
+
+async def _upload_async(data, path: str, counts: UploadCounts, args) -> None:
+    """upload_rows_async on an aiosqlite engine with the same injected latency as the sync engine."""
+    async_engine = local_db.create_local_async_engine(path, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                                      pool_size=args.concurrency)
+    try:
+        await upload_rows_async(data, None, counts, concurrency=args.concurrency, async_engine=async_engine)
+    finally:
+        await async_engine.dispose()
+
+def time_upload(data, path: str, stu_grades: dict, mode: str, args) -> dict:
+    """Uploads `data` into a fresh stand-in database with one strategy; returns wall time, outcome and round trips."""
+    engine = local_db.create_local_engine(path, fixtures_dir=None, reset=True)
+    local_db.seed_students(engine, stu_grades)
+    engine.dispose()
+    engine = local_db.create_local_engine(path, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+
+    counts = UploadCounts()
+    probe.reset()
+    probe.attach(engine)
+    start = time.perf_counter()
+    try:
+        if UPLOAD_MODES[mode] is None:
+            asyncio.run(_upload_async(data, path, counts, args))
+        else:
+            upload_data(data, engine, counts, batch_size=args.batch_size, **UPLOAD_MODES[mode])
+    finally:
+        seconds = time.perf_counter() - start
+        probe.detach(engine)
+        engine.dispose()
+    return {
+        'seconds': round(seconds, 3),
+        'rows_per_s': round(len(data) / seconds, 1) if seconds else None,
+        'success': counts.success,
+        'duplicate': counts.duplicate,
+        'skipped': counts.skipped,
+        'error': counts.error,
+        'round_trips': probe.round_trips,
+    }
+
+def run_scale(scale: int, args) -> dict:
+    """Writes one synthetic district at `scale` and times every stage on it."""
+    result = {'scale': scale}
+    with tempfile.TemporaryDirectory() as tmp:
+        in_dir = os.path.join(tmp, 'in')
+        os.makedirs(in_dir)
+        nurse_info, stu_grades = write_district(in_dir, scale=scale, sheets=args.sheets, rows=args.rows,
+                                                junk_rows=args.junk_rows, seed=args.seed, summary_tabs=args.summary_tabs)
+        files = sorted(os.listdir(in_dir))
+        result['files'] = len(files)
+
+        # load_roster_file reads from ./in
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            timer.reset()
+            start = time.perf_counter()
+            data, _ = combine_roster_frames(iter_roster_frames(files, nurse_info, parse_workers=args.parse_workers))
+            result['ingest_s'] = round(time.perf_counter() - start, 3)
+            stages = timer.summary()
+            result['parse_s'] = stages.get('parse_workbook', {}).get('total_s')
+            result['normalize_s'] = stages.get('apply_roster_dtypes', {}).get('total_s')
+            result['rows_read'] = len(data)
+
+            start = time.perf_counter()
+            data = data[(data['Status'] == 'P') & data['ID_Error'].isna()].drop(columns='ID_Error')
+            result['filter_s'] = round(time.perf_counter() - start, 3)
+            result['rows_final'] = len(data)
+
+            result['upload'] = {}
+            if scale <= args.upload_max_scale:
+                for mode in args.modes:
+                    try:
+                        result['upload'][mode] = time_upload(data, os.path.join(tmp, f"{mode}.sqlite"), stu_grades,
+                                                             mode, args)
+                    except Exception as e:
+                        result['upload'][mode] = {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            os.chdir(cwd)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="Multiples of one district run (10 workbooks)")
+    parser.add_argument('--sheets', type=int, default=DISTRICT_SHEETS, help="Classroom sheets per workbook")
+    parser.add_argument('--rows', type=int, default=DISTRICT_ROWS, help="Students per classroom sheet")
+    parser.add_argument('--junk-rows', type=int, default=2, help="Trailing junk rows per classroom sheet")
+    parser.add_argument('--summary-tabs', nargs='*', default=None,
+                        help="Summary tab names per workbook (default: 'All <count>' and 'Address'); "
+                             "pass the flag with no names for none")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--parse-workers', type=int, default=1)
+    parser.add_argument('--modes', nargs='+', choices=list(UPLOAD_MODES), default=list(UPLOAD_MODES))
+    parser.add_argument('--upload-max-scale', type=int, default=100, help="Skip the upload above this scale")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help="Delay added to every DB round trip, e.g. 15 to mimic the VPN link to Aeries")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Random +/- variation of --latency-ms")
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+    # Time the parsers themselves, not the parsed-roster cache
+    main_4RHearing_upload.ROSTER_CACHE_DIR = ''
+
+    results = [run_scale(scale, args) for scale in args.scales]
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'excel_engine': main_4RHearing_upload.EXCEL_ENGINE,
+        'options': {key: value for key, value in vars(args).items() if key != 'output'},
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'scale':>6}{'files':>7}{'rows':>9}{'ingest s':>10}{'normalize s':>13}  upload s (rows/s)")
+    for result in results:
+        uploads = '  '.join(f"{mode} {stats['seconds']:.2f} ({stats['rows_per_s']:.0f})" if 'seconds' in stats
+                            else f"{mode} failed" for mode, stats in result['upload'].items())
+        print(f"{result['scale']:>6}{result['files']:>7}{result['rows_read']:>9}{result['ingest_s']:>10.2f}"
+              f"{result['normalize_s'] or 0:>13.2f}  {uploads}")
+    print(f"\nSaved results to {args.output}")
+
+if __name__ == '__main__':
+    main()
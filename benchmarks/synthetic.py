@@ -0,0 +1,126 @@
+"""Deterministic synthetic 4RHearing roster workbooks for benchmarks."""
+import os
+import random
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from pandas import DataFrame
+
+# Header rows as they appear in the district roster exports
+ELEMENTARY_HEADER = ['Status', 'Last Name', 'First Name', 'Seat', 'Student ID', 'Grade', 'Gender', 'DOB', 'Teacher', 'SPED']
+MIDDLE_HEADER = ['Status', 'Last Name', 'First Name', 'Seat', 'Student ID', 'DOB', 'Teacher', 'Period', 'Course Title', 'Gender']
+
+STATUSES = ['P'] * 8 + ['NP', 'Abs', 'CNC', 'P ']
+GRADES = ['TK', 'K', '1', '2', '3', '4', '5', 'T-K', 3, 4.0]
+LAST_NAMES = ['Garcia', 'Nguyen', 'Smith', 'Hernandez', 'Lee', 'Lopez', 'Patel', 'Johnson']
+FIRST_NAMES = ['Ana', 'Ben', 'Chloe', 'Diego', 'Emma', 'Farah', 'Gabe', 'Hana']
+TEACHERS = ['Ramos', 'Slaton', 'Supnet', 'Clark', 'Ford', 'Litman']
+
+# Trailing content some exports leave below the roster: column A blank, notes and totals beside it
+JUNK_ROWS = [
+    [None, 'Total students:', None, None, '=COUNTA(E:E)-1'],
+    [None, None, None, None, None, None, 'Rescreen list sent to nurse'],
+    [None, '', '', None, None],
+]
+
+def write_roster_workbook(path: str, layout: str = 'ELEMENTARY', sheets: int = 50, rows: int = 30,
+                          seed: int = 0, first_id: int = 100000, summary_tabs: list = None,
+                          junk_rows: int = 0) -> int:
+    """
+    Writes a roster workbook shaped like the school exports: one classroom sheet per
+    teacher/period plus the 'All' and 'Address' summary tabs the reader skips.
+    
+    Args:
+        path (str): Output .xlsx path.
+        layout (str): 'ELEMENTARY' (Grade in column F) or 'MIDDLE' (Period/Course columns).
+        sheets (int): Number of classroom sheets.
+        rows (int): Student rows per classroom sheet.
+        seed (int): Random seed; the same arguments always produce the same workbook.
+        first_id (int): First Student_ID to hand out.
+        summary_tabs (list): Names of the summary tabs to add after the classroom
+            sheets (default: 'All <count>' and 'Address'); [] adds none.
+        junk_rows (int): Rows with a blank column A to leave under each roster after
+            a blank row, like the totals and notes in some exports.
+    
+    Returns:
+        int: Number of student rows written.
+    """
+    rng = random.Random(seed)
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    student_id = first_id
+    
+    for sheet_number in range(sheets):
+        teacher = rng.choice(TEACHERS)
+        worksheet = workbook.create_sheet(f"{teacher} ({sheet_number})")
+        worksheet.append(MIDDLE_HEADER if layout == 'MIDDLE' else ELEMENTARY_HEADER)
+        for seat in range(1, rows + 1):
+            status = rng.choice(STATUSES)
+            last = rng.choice(LAST_NAMES)
+            first = rng.choice(FIRST_NAMES)
+            dob = datetime(2012, 1, 1) + timedelta(days=rng.randrange(2500))
+            gender = rng.choice(['M', 'F'])
+            if layout == 'MIDDLE':
+                worksheet.append([status, last, first, seat, student_id, dob, teacher, rng.randrange(1, 7), 'Science 7', gender])
+            else:
+                worksheet.append([status, last, first, seat, student_id, rng.choice(GRADES), gender, dob, teacher, rng.choice(['Y', 'N'])])
+            student_id += 1
+        if junk_rows:
+            worksheet.append([])
+            for junk_number in range(junk_rows):
+                worksheet.append(JUNK_ROWS[junk_number % len(JUNK_ROWS)])
+    
+    if summary_tabs is None:
+        summary_tabs = [f"All {sheets * rows}", 'Address']
+    for tab in summary_tabs:
+        summary = workbook.create_sheet(tab)
+        if 'address' in tab.lower():
+            summary.append(['Street', 'City'])
+            summary.append(['1 Main St', 'San Leandro'])
+        else:
+            summary.append(['School', 'Count'])
+            summary.append(['Synthetic', sheets * rows])
+    
+    workbook.save(path)
+    return sheets * rows
+
+# One real district run (log.log.bak): 10 school workbooks, ~320 classroom sheets, ~3,200 rows
+DISTRICT_SCHOOLS = 10
+DISTRICT_SHEETS = 32
+DISTRICT_ROWS = 10
+
+def write_district(directory: str, scale: int = 1, sheets: int = DISTRICT_SHEETS, rows: int = DISTRICT_ROWS,
+                   junk_rows: int = 2, seed: int = 0, summary_tabs: list = None) -> tuple:
+    """
+    Writes `scale` x the district's school workbooks into `directory`, every fifth
+    school in the MIDDLE layout, with unique Student_IDs across the district.
+    
+    Args:
+        directory (str): Output folder (the script's ./in).
+        scale (int): Multiple of one real district run.
+        sheets (int): Classroom sheets per workbook.
+        rows (int): Student rows per classroom sheet.
+        junk_rows (int): Trailing junk rows per classroom sheet.
+        seed (int): Base random seed.
+        summary_tabs (list): Summary tab names per workbook (see write_roster_workbook);
+            None for the default 'All <count>' and 'Address', [] for none.
+    
+    Returns:
+        tuple: (nurse info DataFrame shaped like nurses_and_dates.csv, dict of Student_ID -> STU grade)
+    """
+    rng = random.Random(seed)
+    nurses = []
+    stu_grades = {}
+    first_id = 100000
+    for school_number in range(DISTRICT_SCHOOLS * scale):
+        school = f"School{school_number:04d}"
+        layout = 'MIDDLE' if school_number % 5 == 4 else 'ELEMENTARY'
+        path = os.path.join(directory, f"{school} Rosters 4RHearing 25-26 as of 10_17_25.xlsx")
+        written = write_roster_workbook(path, layout=layout, sheets=sheets, rows=rows, seed=seed + school_number,
+                                        first_id=first_id, summary_tabs=summary_tabs, junk_rows=junk_rows)
+        grade_range = (6, 8) if layout == 'MIDDLE' else (0, 5)
+        for student_id in range(first_id, first_id + written):
+            stu_grades[student_id] = rng.randint(*grade_range)
+        first_id += written
+        nurses.append({'school': school, 'date': '10/17/2025', 'nurse_first': rng.choice(FIRST_NAMES),
+                       'nurse_last': rng.choice(LAST_NAMES), 'sc': school_number + 1})
+    return DataFrame(nurses), stu_grades
@@ -0,0 +1,236 @@
+"""
+Lightweight timing for the 4RHearing upload: wall-time samples per named stage,
+summarized as call counts, totals and p50/p95/p99 latencies, a probe counting
+database round trips per statement, and the JSON run report
+main_4RHearing_upload.main() writes at the end of every run.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+import bisect
+import functools
+import inspect
+import json
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Linearly interpolated q-th percentile (0-100) of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_samples(samples: list) -> dict:
+    """Call count, total seconds and mean/p50/p95/p99/max milliseconds of a list of durations."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'calls': len(ordered),
+        'total_s': round(total, 6),
+        'mean_ms': round(total / len(ordered) * 1000, 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+class StageTimer:
+    """Wall-time samples per stage name, safe to record from several threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[name].append(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the body of a `with` block as one call of `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: str = None):
+        """Decorator recording each call of a function (sync or async) under `name` (default: its name)."""
+        def decorator(func):
+            stage_name = name or func.__name__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.stage(stage_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def drain(self) -> dict:
+        """Returns and clears the raw samples, e.g. to ship them back from a worker process."""
+        with self._lock:
+            samples, self._samples = dict(self._samples), defaultdict(list)
+        return samples
+
+    def merge(self, samples: dict) -> None:
+        """Adds raw samples drained from another timer."""
+        with self._lock:
+            for name, values in samples.items():
+                self._samples[name].extend(values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> dict:
+        """Stage name -> summarize_samples() of its calls, in first-recorded order."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        return {name: summarize_samples(values) for name, values in samples.items()}
+
+
+# Process-wide timer used by the upload script
+timer = StageTimer()
+
+
+# Upper bounds (ms) of the statement latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def statement_fingerprint(statement: str) -> str:
+    """
+    Normalizes SQL so every execution of the same query shape shares a key: string
+    and numeric literals become ?, expanded IN lists collapse to (?...), numbered
+    savepoint names lose their number and whitespace is squeezed.
+    """
+    fingerprint = re.sub(r"'(?:[^']|'')*'", '?', statement)
+    fingerprint = re.sub(r'\b(sa_savepoint)_\d+', r'\1_?', fingerprint)
+    fingerprint = re.sub(r'(?<![\w@#])-?\d+(?:\.\d+)?\b', '?', fingerprint)
+    fingerprint = re.sub(r':\w+', '?', fingerprint)
+    fingerprint = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?...)', fingerprint)
+    return ' '.join(fingerprint.split())
+
+
+class QueryProbe:
+    """
+    Counts the statements sent through one or more SQLAlchemy engines, per statement
+    fingerprint, with latency samples and a histogram, using the engine's
+    before/after_cursor_execute events. An executemany call is one round trip.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = []
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.round_trips = 0
+            self.errors = 0
+            self._samples = defaultdict(list)
+            self._rows = defaultdict(int)
+
+    def attach(self, engine) -> None:
+        """Starts recording statements on `engine` (for an AsyncEngine pass engine.sync_engine)."""
+        if any(attached is engine for attached in self._engines):
+            return
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+        self._engines.append(engine)
+
+    def detach(self, engine) -> None:
+        """Stops recording statements on `engine`."""
+        if not any(attached is engine for attached in self._engines):
+            return
+        event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.remove(engine, 'handle_error', self._handle_error)
+        self._engines = [attached for attached in self._engines if attached is not engine]
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('probe_start_times', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._record(conn, statement, len(parameters) if executemany else 1)
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and exception_context.statement and conn.info.get('probe_start_times'):
+            self._record(conn, exception_context.statement, 1, failed=True)
+
+    def _record(self, conn, statement: str, rows: int, failed: bool = False) -> None:
+        elapsed = time.perf_counter() - conn.info['probe_start_times'].pop()
+        fingerprint = statement_fingerprint(statement)
+        with self._lock:
+            self.round_trips += 1
+            self.errors += failed
+            self._samples[fingerprint].append(elapsed)
+            self._rows[fingerprint] += rows
+
+    def statements(self) -> dict:
+        """
+        Fingerprint -> calls, parameter rows, total seconds, p50/p95/p99 latency and
+        histogram (bucket upper bound in ms -> calls), busiest fingerprint first.
+        """
+        with self._lock:
+            samples = {fingerprint: list(values) for fingerprint, values in self._samples.items()}
+            rows = dict(self._rows)
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        stats = {}
+        for fingerprint, values in sorted(samples.items(), key=lambda item: -len(item[1])):
+            buckets = [0] * len(labels)
+            for seconds in values:
+                buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+            stats[fingerprint] = dict(summarize_samples(values), rows=rows[fingerprint],
+                                      histogram={label: n for label, n in zip(labels, buckets) if n})
+        return stats
+
+    def summary(self) -> dict:
+        """Round trips, failed statements and per-fingerprint statistics, for the run report."""
+        return {'round_trips': self.round_trips, 'errors': self.errors, 'statements': self.statements()}
+
+
+# Process-wide probe on the Aeries connection
+probe = QueryProbe()
+
+
+def write_run_report(path: str, started: datetime, **sections) -> dict:
+    """
+    Writes the run report as JSON: start/finish time, total wall seconds, the stage
+    timings from `timer`, the database statements seen by `probe`, plus any extra
+    sections (row counts, upload outcome, ...).
+
+    Args:
+        path (str): Output file, e.g. run_report.json.
+        started (datetime): When the run began.
+        **sections: Additional JSON-serializable top-level entries.
+
+    Returns:
+        dict: The report that was written.
+    """
+    finished = datetime.now()
+    report = {
+        'started': started.isoformat(timespec='seconds'),
+        'finished': finished.isoformat(timespec='seconds'),
+        'wall_s': round((finished - started).total_seconds(), 3),
+        'stages': timer.summary(),
+        'db': probe.summary(),
+        **sections,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    return report
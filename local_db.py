@@ -0,0 +1,208 @@
+"""
+SQLite stand-in for the Aeries tables the upload touches (HRN and STU), so the
+whole upload path can be run, benchmarked and regression-tested offline.
+
+Select it with DB_BACKEND=sqlite (see main_4RHearing_upload.get_cnxn). The
+database is created on first use and seeded from the CSV fixtures in ./fixtures.
+
+For benchmarks the connections can add a fixed per-statement latency plus random
+jitter, standing in for the WAN/VPN round trip to the Aeries server that a local
+file does not have.
+"""
+import csv
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+from pandas import Timestamp
+from sqlalchemy import create_engine, event, text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Only the columns the upload reads or writes. TD is declared TIMESTAMP so
+# detect_types hands it back as a datetime, like SQL Server does.
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS HRN (PID INT NOT NULL, SQ INT NOT NULL, GR INT, SR TEXT, SL TEXT, PF TEXT, "
+    "TD TIMESTAMP, SCL INT, [IN] TEXT, PRIMARY KEY (PID, SQ))",
+    "CREATE INDEX IF NOT EXISTS HRN_PID_TD ON HRN (PID, TD)",
+    "CREATE TABLE IF NOT EXISTS STU (ID INT PRIMARY KEY, GR INT, DEL INT NOT NULL DEFAULT 0, TG TEXT NOT NULL DEFAULT '')",
+]
+
+
+def register_adapters() -> None:
+    """Lets sqlite3 bind pandas Timestamps/datetimes and read TIMESTAMP columns back as datetimes."""
+    sqlite3.register_adapter(Timestamp, lambda ts: ts.isoformat(' '))
+    sqlite3.register_adapter(datetime, lambda dt: dt.isoformat(' '))
+    sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+
+
+class LatencyConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that sleeps before every statement, executemany batch, commit
+    and rollback, like a network round trip to a remote server. Subclass it through
+    latency_connection() to set the delay.
+    """
+    latency_s = 0.0
+    jitter_s = 0.0
+
+    def round_trip(self) -> None:
+        delay = self.latency_s + random.uniform(-self.jitter_s, self.jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or LatencyCursor)
+
+    def commit(self):
+        self.round_trip()
+        super().commit()
+
+    def rollback(self):
+        self.round_trip()
+        super().rollback()
+
+
+class LatencyCursor(sqlite3.Cursor):
+    """Cursor of a LatencyConnection; an executemany call is one round trip."""
+    def execute(self, *args, **kwargs):
+        self.connection.round_trip()
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self.connection.round_trip()
+        return super().executemany(*args, **kwargs)
+
+
+def latency_connection(latency_ms: float, jitter_ms: float = 0.0) -> type:
+    """LatencyConnection subclass adding `latency_ms` +/- `jitter_ms` (uniform) to every round trip."""
+    return type('LatencyConnection', (LatencyConnection,), {'latency_s': latency_ms / 1000, 'jitter_s': jitter_ms / 1000})
+
+
+def _enable_savepoints(engine) -> None:
+    """pysqlite starts transactions on its own, which breaks SAVEPOINT; let SQLAlchemy emit BEGIN instead."""
+    @event.listens_for(engine, 'connect')
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+
+def create_schema(engine) -> None:
+    """Creates the HRN and STU tables (and the HRN (PID, TD) index) if they don't exist."""
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.exec_driver_sql(statement)
+
+
+def load_fixtures(engine, fixtures_dir: str = FIXTURES_DIR) -> dict:
+    """
+    Inserts every <TABLE>.csv in `fixtures_dir` into the table of the same name.
+    Empty CSV cells take the column's default (NULL unless the schema sets one,
+    e.g. STU.TG = '').
+
+    Args:
+        engine: SQLAlchemy engine from create_local_engine.
+        fixtures_dir (str): Folder of CSV files with a header row of column names.
+
+    Returns:
+        dict: Table name -> rows inserted.
+    """
+    loaded = {}
+    for name in sorted(os.listdir(fixtures_dir)):
+        if not name.lower().endswith('.csv'):
+            continue
+        table = os.path.splitext(name)[0].upper()
+        with open(os.path.join(fixtures_dir, name), newline='') as f:
+            rows = [{col: value for col, value in row.items() if value != ''} for row in csv.DictReader(f)]
+        # One executemany per set of filled-in columns, so omitted columns get their default
+        by_columns = {}
+        for row in rows:
+            by_columns.setdefault(tuple(row), []).append(row)
+        with engine.begin() as conn:
+            for columns, group in by_columns.items():
+                conn.execute(text(f"INSERT INTO {table} ({', '.join(f'[{col}]' for col in columns)}) "
+                                  f"VALUES ({', '.join(f':{col}' for col in columns)})"), group)
+        loaded[table] = len(rows)
+    return loaded
+
+
+def seed_students(engine, grades: dict) -> None:
+    """Adds an active STU row per Student_ID -> grade in `grades`."""
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO STU (ID, GR) VALUES (:id, :gr)"),
+                     [{'id': student_id, 'gr': grade} for student_id, grade in grades.items()])
+
+
+def _connect_kwargs(latency_ms: float, jitter_ms: float) -> dict:
+    """sqlite3.connect arguments shared by the sync and async engines."""
+    kwargs = {'detect_types': sqlite3.PARSE_DECLTYPES, 'timeout': 60, 'check_same_thread': False}
+    if latency_ms or jitter_ms:
+        kwargs['factory'] = latency_connection(latency_ms, jitter_ms)
+    return kwargs
+
+
+def create_local_engine(path: str = 'local_aeries.sqlite', fixtures_dir: str = FIXTURES_DIR, reset: bool = False,
+                        latency_ms: float = 0.0, jitter_ms: float = 0.0, **engine_kwargs):
+    """
+    Opens (creating and seeding on first use) the SQLite stand-in database.
+
+    Args:
+        path (str): Database file.
+        fixtures_dir (str): Fixtures loaded when the database is created; None or '' loads none.
+        reset (bool): Delete an existing database file first.
+        latency_ms (float): Delay added to every round trip (see LatencyConnection).
+        jitter_ms (float): Random +/- variation of that delay.
+        **engine_kwargs: Passed to create_engine.
+
+    Returns:
+        Engine: SQLAlchemy engine with savepoints working and TIMESTAMPs parsed.
+    """
+    if reset and os.path.exists(path):
+        os.remove(path)
+    is_new = not os.path.exists(path)
+
+    register_adapters()
+    connect_kwargs = _connect_kwargs(latency_ms, jitter_ms)
+    engine = create_engine(f"sqlite:///{path}", creator=lambda: sqlite3.connect(path, **connect_kwargs), **engine_kwargs)
+    _enable_savepoints(engine)
+
+    try:
+        create_schema(engine)
+        if is_new and fixtures_dir:
+            load_fixtures(engine, fixtures_dir)
+    except Exception:
+        # Don't leave a half-seeded database behind to be picked up as "existing" next time
+        engine.dispose()
+        if is_new and os.path.exists(path):
+            os.remove(path)
+        raise
+    return engine
+
+
+def create_local_async_engine(path: str = 'local_aeries.sqlite', latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                              **engine_kwargs):
+    """
+    aiosqlite engine on an existing stand-in database (create it with create_local_engine
+    first), for upload_rows_async. The latency sleeps run on aiosqlite's connection
+    thread, so other connections keep going, as they would while waiting on a server.
+
+    Args:
+        path (str): Database file.
+        latency_ms (float): Delay added to every round trip (see LatencyConnection).
+        jitter_ms (float): Random +/- variation of that delay.
+        **engine_kwargs: Passed to create_async_engine (e.g. pool_size).
+
+    Returns:
+        AsyncEngine: Needs sqlalchemy[asyncio] and aiosqlite.
+    """
+    import aiosqlite
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    register_adapters()
+    connect_kwargs = _connect_kwargs(latency_ms, jitter_ms)
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", async_creator=lambda: aiosqlite.connect(path, **connect_kwargs),
+                               **engine_kwargs)
@@ -1,15 +1,323 @@
 import dateparser
 from slusdlib import core, aeries
-from pandas import DataFrame, read_csv, read_excel, read_sql_query, concat, notna
-from sqlalchemy import text
-from typing import Union
+from instrumentation import probe, timer, write_run_report
+import local_db
+from pandas import DataFrame, MultiIndex, Series, read_csv, read_excel, read_parquet, read_sql_query, concat, factorize, notna, to_datetime, to_numeric
+from sqlalchemy import bindparam, event, text
+from numpy import bincount
+from typing import NamedTuple, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import argparse
+import threading
+import asyncio
 from decouple import config
+from openpyxl import load_workbook
+from xml.etree.ElementTree import iterparse, parse as parse_xml
+from datetime import datetime, timedelta
+from itertools import repeat
+import hashlib
+import sqlite3
+import posixpath
+import re
+import zipfile
 import os
 
-cnxn = aeries.get_aeries_cnxn(access_level='w') if config('ENVIRONMENT', default=None) == 'PROD' else aeries.get_aeries_cnxn(database=config('TEST_DATABASE', default='DST25000SLUSD_DAILY'), access_level='w')
 sql = core.build_sql_object()
 
-def read_all_excel_sheets_standardized(file_path: str) -> DataFrame:
+def _aeries_cnxn():
+    """Write connection to the production Aeries database when ENVIRONMENT=PROD, else the test database."""
+    if config('ENVIRONMENT', default=None) == 'PROD':
+        return aeries.get_aeries_cnxn(access_level='w')
+    return aeries.get_aeries_cnxn(database=config('TEST_DATABASE', default='DST25000SLUSD_DAILY'), access_level='w')
+
+def _local_cnxn():
+    """SQLite stand-in with the HRN/STU tables, created and seeded from ./fixtures on first use."""
+    return local_db.create_local_engine(config('LOCAL_DB_PATH', default='local_aeries.sqlite'))
+
+# Connection factories by DB_BACKEND name; each returns a SQLAlchemy engine
+CONNECTION_FACTORIES = {
+    'aeries': _aeries_cnxn,
+    'sqlite': _local_cnxn,
+}
+DB_BACKEND = config('DB_BACKEND', default='aeries')
+_cnxn = None
+
+def get_cnxn():
+    """The engine for DB_BACKEND, created on first use and shared for the rest of the run."""
+    if _cnxn is None:
+        set_cnxn(CONNECTION_FACTORIES[DB_BACKEND]())
+    return _cnxn
+
+def set_cnxn(engine) -> None:
+    """Use `engine` for the rest of the run (e.g. a local or wrapped engine in benchmarks)."""
+    global _cnxn
+    if _cnxn is not None:
+        probe.detach(_cnxn)
+    _cnxn = engine
+    # Count every statement sent to the database (see instrumentation.QueryProbe)
+    probe.attach(engine)
+
+# Grades to use instead of STU.GR for specific students
+GRADE_OVERRIDES = {
+    113507: '8',
+}
+
+def _grade_override(pid: int) -> Union[str, None]:
+    """The GRADE_OVERRIDES grade for a student (logged when used), or None."""
+    grade = GRADE_OVERRIDES.get(pid)
+    if grade is not None:
+        core.log(f'Overriding grade for ID {pid} to {grade}')
+    return grade
+
+# Lookups shared by the batch loaders (chunked IN lists for the whole upload) and the
+# async loader (one-student lists), so both paths read the same rows the same way
+HRN_KEYS_QUERY = text("SELECT PID, TD FROM HRN WHERE PID IN :pids").bindparams(bindparam('pids', expanding=True))
+HRN_MAX_SQ_QUERY = text("SELECT PID, MAX(SQ) AS SQ FROM HRN WHERE PID IN :pids GROUP BY PID").bindparams(bindparam('pids', expanding=True))
+STU_GRADES_QUERY = text("SELECT ID, GR FROM STU WHERE DEL = 0 AND TG = '' AND ID IN :ids").bindparams(bindparam('ids', expanding=True))
+
+# SQL Server rejects statements with more than 2100 parameters, so IN lists are chunked below that
+IN_CLAUSE_CHUNK_SIZE = 2000
+
+def _chunked(values: list, size: int = IN_CLAUSE_CHUNK_SIZE):
+    """Yield successive slices of at most `size` items from a list."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+# Workbook reader: 'streaming' (openpyxl read-only), 'xml' (zip/XML fast path) or 'pandas' (read_excel of every sheet)
+EXCEL_ENGINE = config('EXCEL_ENGINE', default='streaming')
+
+def _read_sheets_streaming(file_path: str, skip_sheets: list, max_col: int = 10) -> dict:
+    """
+    Streams a workbook with openpyxl in read-only mode. Excluded sheets are skipped
+    before any of their cells are read, only columns A-J are decoded, and each sheet
+    stops at the first row whose column A is blank instead of running out to the
+    formatted-but-empty rows at the sheet's max_row.
+    
+    Args:
+        file_path (str): The full path to the Excel file.
+        skip_sheets (list): Lower-case fragments of sheet names to skip.
+        max_col (int): Number of leading columns to read.
+    
+    Returns:
+        dict: Sheet name -> DataFrame with the first row as header, like
+        `read_excel(file_path, sheet_name=None)` for the sheets that were kept.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    sheets = {}
+    try:
+        for worksheet in workbook.worksheets:
+            if any(skip in worksheet.title.lower() for skip in skip_sheets):
+                core.log(f"Skipping summary sheet: {worksheet.title}")
+                continue
+            
+            rows = worksheet.iter_rows(max_col=max_col, values_only=True)
+            header = list(next(rows, ()))
+            records = []
+            for row in rows:
+                if not row or row[0] is None or str(row[0]).strip() == '':
+                    break
+                records.append(list(row))
+            
+            # Read-only rows can be shorter than the header (or each other); pad to one width
+            width = max([len(header)] + [len(record) for record in records])
+            header += [None] * (width - len(header))
+            records = [record + [None] * (width - len(record)) for record in records]
+            sheets[worksheet.title] = DataFrame(records, columns=header)
+    finally:
+        workbook.close()
+    return sheets
+
+# Parsed workbooks are cached as Parquet keyed by the workbook's SHA-256; an empty value disables the cache.
+# Bump PARSER_VERSION whenever the reader's output changes so stale entries are ignored.
+ROSTER_CACHE_DIR = config('ROSTER_CACHE_DIR', default='.roster_cache')
+PARSER_VERSION = '1'
+
+def _file_sha256(file_path: str) -> str:
+    """Hex SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _roster_cache_path(file_path: str, engine: str, early_filter: bool = False, sha256: str = None) -> str:
+    """
+    Cache file for a workbook: SHA-256 of its bytes plus the parser version, engine and
+    filter option. Pass `sha256` when the digest is already known to skip rehashing.
+    """
+    variant = f"{engine}-p" if early_filter else engine
+    return os.path.join(ROSTER_CACHE_DIR, f"{sha256 or _file_sha256(file_path)}-v{PARSER_VERSION}-{variant}.parquet")
+
+def _write_roster_cache(df: DataFrame, cache_path: str) -> None:
+    """Saves a parsed workbook to the cache. Failures are logged and otherwise ignored."""
+    cached = df.copy()
+    # Parquet needs one type per column, so mixed object columns (Grade holding 'K' and 3,
+    # IDs holding 12345 and '12345 ') are stored as text, which the later stages parse the same way
+    for col in cached.columns[cached.dtypes == object]:
+        if len({type(value) for value in cached[col].dropna()}) > 1:
+            cached[col] = cached[col].astype(str).where(cached[col].notna(), None)
+    try:
+        os.makedirs(ROSTER_CACHE_DIR, exist_ok=True)
+        cached.to_parquet(cache_path, index=False)
+    except Exception as e:
+        core.log(f"Could not cache parsed workbook to {cache_path}: {e}")
+
+# With EARLY_FILTER each sheet is cut down to 'P' rows and the columns the HRN load uses
+# before concatenation; the dropped columns can be kept in per-workbook CSVs under AUDIT_DIR
+EARLY_FILTER = config('EARLY_FILTER', default=False, cast=bool)
+AUDIT_DIR = config('AUDIT_DIR', default='')
+UNUSED_COLUMNS = ['Seat_Number', 'DOB', 'Teacher_Name', 'Period', 'Course_Title', 'Gender', 'SPED']
+AUDIT_KEY_COLUMNS = ['Sheet_Name', 'Status', 'Student_ID', 'Last_Name', 'First_Name']
+
+# SpreadsheetML namespaces used by the 'xml' engine
+XLSX_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+}
+# Built-in number formats Excel renders as dates/times
+XLSX_BUILTIN_DATE_FORMATS = set(range(14, 23)) | {45, 46, 47}
+
+class _LazySharedStrings:
+    """Shared string table that is only parsed as far as the highest index requested."""
+    def __init__(self, archive: zipfile.ZipFile, name: Union[str, None]):
+        self._strings = []
+        self._events = iterparse(archive.open(name)) if name else iter(())
+    
+    def __getitem__(self, index: int) -> str:
+        while index >= len(self._strings):
+            _, elem = next(self._events)
+            if elem.tag == f"{{{XLSX_NS['main']}}}si":
+                # Plain <t> or rich-text runs <r><t>; phonetic <rPh> hints are not cell text
+                texts = elem.findall('main:t', XLSX_NS) + elem.findall('main:r/main:t', XLSX_NS)
+                self._strings.append(''.join(t.text or '' for t in texts))
+                elem.clear()
+        return self._strings[index]
+
+def _xlsx_date_styles(archive: zipfile.ZipFile) -> set:
+    """Indices into cellXfs whose number format is a date/time format."""
+    if 'xl/styles.xml' not in archive.namelist():
+        return set()
+    root = parse_xml(archive.open('xl/styles.xml')).getroot()
+    date_formats = set(XLSX_BUILTIN_DATE_FORMATS)
+    for num_fmt in root.iterfind('main:numFmts/main:numFmt', XLSX_NS):
+        # Drop quoted literals, [colour]/[$-locale] sections and escaped characters before looking for date tokens
+        code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', '', num_fmt.get('formatCode', ''))
+        if re.search(r'[dmyhs]', code, re.IGNORECASE):
+            date_formats.add(int(num_fmt.get('numFmtId')))
+    return {
+        index for index, xf in enumerate(root.iterfind('main:cellXfs/main:xf', XLSX_NS))
+        if int(xf.get('numFmtId', 0)) in date_formats
+    }
+
+def _xlsx_column_index(ref: str) -> int:
+    """1-based column number of a cell reference such as 'J12'."""
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index
+
+def _read_sheets_xml(file_path: str, skip_sheets: list, max_col: int = 10) -> dict:
+    """
+    Fast path for the fixed roster layout: reads the xlsx as a zip, resolves sheet
+    names from workbook.xml, and stream-parses only cells in the first `max_col`
+    columns of each kept sheet, stopping at the first blank column A. Shared strings
+    are decoded lazily. Raises on anything it does not understand so the caller can
+    fall back to the pandas engine.
+    
+    Args:
+        file_path (str): The full path to the Excel file.
+        skip_sheets (list): Lower-case fragments of sheet names to skip.
+        max_col (int): Number of leading columns to read.
+    
+    Returns:
+        dict: Sheet name -> DataFrame with the first row as header, like
+        `read_excel(file_path, sheet_name=None)` for the sheets that were kept.
+    """
+    main_ns = f"{{{XLSX_NS['main']}}}"
+    with zipfile.ZipFile(file_path) as archive:
+        workbook = parse_xml(archive.open('xl/workbook.xml')).getroot()
+        rels = parse_xml(archive.open('xl/_rels/workbook.xml.rels')).getroot()
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.iterfind('rel:Relationship', XLSX_NS)}
+        workbook_pr = workbook.find('main:workbookPr', XLSX_NS)
+        date1904 = workbook_pr is not None and workbook_pr.get('date1904') in ('1', 'true')
+        epoch = datetime(1904, 1, 1) if date1904 else datetime(1899, 12, 30)
+        date_styles = _xlsx_date_styles(archive)
+        shared_strings = _LazySharedStrings(archive, 'xl/sharedStrings.xml' if 'xl/sharedStrings.xml' in archive.namelist() else None)
+        
+        def cell_value(cell):
+            cell_type = cell.get('t', 'n')
+            if cell_type == 'inlineStr':
+                return ''.join(t.text or '' for t in cell.iter(f"{main_ns}t"))
+            raw = cell.findtext(f"{main_ns}v")
+            if raw is None:
+                return None
+            if cell_type == 's':
+                return shared_strings[int(raw)]
+            if cell_type in ('str', 'e'):
+                return raw
+            if cell_type == 'b':
+                return raw == '1'
+            if cell_type != 'n':
+                raise ValueError(f"unexpected cell type '{cell_type}'")
+            number = float(raw) if any(char in raw for char in '.eE') else int(raw)
+            if int(cell.get('s', 0)) in date_styles:
+                # Excel's 1900 system counts a nonexistent 29 Feb 1900
+                if not date1904 and number < 60:
+                    number += 1
+                return epoch + timedelta(days=number)
+            return number
+        
+        sheets = {}
+        for sheet in workbook.iterfind('main:sheets/main:sheet', XLSX_NS):
+            sheet_name = sheet.get('name')
+            if any(skip in sheet_name.lower() for skip in skip_sheets):
+                core.log(f"Skipping summary sheet: {sheet_name}")
+                continue
+            
+            target = targets[sheet.get(f"{{{XLSX_NS['r']}}}id")]
+            part = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            header = []
+            records = []
+            expected_row = 1
+            with archive.open(part) as stream:
+                for _, elem in iterparse(stream):
+                    if elem.tag != f"{main_ns}row":
+                        continue
+                    row_number = int(elem.get('r', expected_row))
+                    if row_number != expected_row and expected_row > 1:
+                        # Rows missing from the XML are blank, so column A is blank: end of data
+                        break
+                    values = [None] * max_col
+                    column = 0
+                    for cell in elem.iterfind(f"{main_ns}c"):
+                        # The r attribute is optional; without it cells are consecutive
+                        column = _xlsx_column_index(cell.get('r')) if cell.get('r') else column + 1
+                        if column <= max_col:
+                            values[column - 1] = cell_value(cell)
+                    elem.clear()
+                    while values and values[-1] is None:
+                        values.pop()
+                    
+                    if row_number == 1:
+                        header = values
+                    else:
+                        if not values or values[0] is None or str(values[0]).strip() == '':
+                            break
+                        records.append(values)
+                    expected_row = row_number + 1
+            
+            width = max([len(header)] + [len(record) for record in records])
+            header += [None] * (width - len(header))
+            records = [record + [None] * (width - len(record)) for record in records]
+            sheets[sheet_name] = DataFrame(records, columns=header)
+    return sheets
+
+@timer.timed('parse_workbook')
+def read_all_excel_sheets_standardized(file_path: str, engine: str = EXCEL_ENGINE, early_filter: bool = EARLY_FILTER,
+                                       audit_dir: str = AUDIT_DIR, sha256: str = None) -> DataFrame:
     """
     Reads all sheets from an Excel file, taking only the first 10 columns (A-J),
     stopping at rows where column A is blank, and applying standardized column names.
@@ -17,6 +325,10 @@ def read_all_excel_sheets_standardized(file_path: str) -> DataFrame:
     
     Args:
         file_path (str): The full path to the Excel file.
+        engine (str): 'streaming' (default), 'xml' or 'pandas'.
+        early_filter (bool): Keep only 'P' rows (Status normalized) and drop UNUSED_COLUMNS per sheet.
+        audit_dir (str): With early_filter, write every row's dropped columns to a CSV here.
+        sha256 (str): The workbook's SHA-256 if already known (e.g. from the manifest check).
     
     Returns:
         pd.DataFrame: A single DataFrame with standardized columns from all sheets.
@@ -24,9 +336,33 @@ def read_all_excel_sheets_standardized(file_path: str) -> DataFrame:
     # Sheet names to skip (these are typically summary/aggregate sheets)
     SKIP_SHEETS = ['all', 'address', 'summary', 'total', 'roster']
     
+    audit_path = os.path.join(audit_dir, f"{os.path.basename(file_path)}.audit.csv") if early_filter and audit_dir else None
+    
+    # Unchanged workbooks are served from the parsed-roster cache without touching Excel
+    # (unless an audit sidecar is wanted and has not been written yet)
+    cache_path = None
+    if ROSTER_CACHE_DIR and os.path.isfile(file_path):
+        cache_path = _roster_cache_path(file_path, engine, early_filter, sha256=sha256)
+        if os.path.exists(cache_path) and (audit_path is None or os.path.exists(audit_path)):
+            try:
+                cached = read_parquet(cache_path)
+                core.log(f"Loaded {len(cached)} rows for {os.path.basename(file_path)} from cache")
+                return cached
+            except Exception as e:
+                core.log(f"Ignoring unreadable cache entry {cache_path}: {e}")
+    
     try:
-        # Read all sheets
-        all_sheets_data = read_excel(file_path, sheet_name=None)
+        if engine == 'pandas':
+            # Read all sheets
+            all_sheets_data = read_excel(file_path, sheet_name=None)
+        elif engine == 'xml':
+            try:
+                all_sheets_data = _read_sheets_xml(file_path, SKIP_SHEETS)
+            except Exception as e:
+                core.log(f"Fast xlsx reader could not handle {file_path} ({e}), falling back to pandas")
+                all_sheets_data = read_excel(file_path, sheet_name=None)
+        else:
+            all_sheets_data = _read_sheets_streaming(file_path, SKIP_SHEETS)
     except FileNotFoundError:
         core.log(f"Error: The file was not found at path: {file_path}")
         return DataFrame()
@@ -35,6 +371,7 @@ def read_all_excel_sheets_standardized(file_path: str) -> DataFrame:
         return DataFrame()
 
     list_of_dfs = []
+    audit_dfs = []
     
     # Detect school type by checking first classroom sheet
     school_type = None
@@ -118,231 +455,1109 @@ def read_all_excel_sheets_standardized(file_path: str) -> DataFrame:
         # Add sheet name for reference
         df['Sheet_Name'] = sheet_name
         
+        if early_filter:
+            unused = [col for col in UNUSED_COLUMNS if col in df.columns]
+            if audit_path:
+                audit_dfs.append(df[[col for col in AUDIT_KEY_COLUMNS if col in df.columns] + unused])
+            df['Status'] = df['Status'].astype(str).str.strip().str.upper()
+            df = df.loc[df['Status'] == 'P'].drop(columns=unused)
+        
         core.log(f"Processed sheet '{sheet_name}': {len(df)} rows")
         list_of_dfs.append(df)
     
+    if audit_dfs:
+        os.makedirs(audit_dir, exist_ok=True)
+        concat(audit_dfs, ignore_index=True).to_csv(audit_path, index=False)
+        core.log(f"Saved dropped columns for {os.path.basename(file_path)} to {audit_path}")
+    
     # Concatenate all sheets
     if list_of_dfs:
         combined_df = concat(list_of_dfs, ignore_index=True)
+        if cache_path:
+            _write_roster_cache(combined_df, cache_path)
         return combined_df
     else:
         return DataFrame()
 
-def get_next_sq(id, cnxn, table) -> int:
-    """Get the next sequence number for a given table."""
-    query = f"SELECT top 1 SQ FROM {table} WHERE PID = :id ORDER BY SQ DESC"
-    result = read_sql_query(text(query), cnxn, params={"id": id})
-    if not result.empty:
-        next_sq = result['SQ'].iloc[0] + 1
-        return int(next_sq)
+@timer.timed()
+def get_max_sq_by_pid(ids: list, cnxn) -> dict:
+    """
+    Fetches the current highest sequence number for every student in a batch,
+    one chunked GROUP BY query per 2000 IDs.
+    
+    Args:
+        ids (list): Student IDs in the batch (duplicates are fine).
+        cnxn: SQLAlchemy engine or connection.
+    
+    Returns:
+        dict: PID -> current MAX(SQ). Students with no rows are absent, so callers
+        use `.get(pid, 0) + 1` for the next sequence number.
+    """
+    unique_ids = sorted({int(pid) for pid in ids})
+    max_sq = {}
+    for chunk in _chunked(unique_ids):
+        result = read_sql_query(HRN_MAX_SQ_QUERY, cnxn, params={"pids": chunk})
+        max_sq.update(zip(result['PID'].astype(int), result['SQ'].astype(int)))
+    return max_sq
+
+@timer.timed()
+def get_grades_from_ids(ids: list, cnxn) -> dict:
+    """
+    Loads STU grades for many students in chunked IN queries and applies
+    GRADE_OVERRIDES on top.
+    
+    Args:
+        ids (list): Student IDs needing a grade (duplicates are fine).
+        cnxn: SQLAlchemy engine or connection.
+    
+    Returns:
+        dict: Student ID -> grade string. IDs not found in STU are absent.
+    """
+    unique_ids = sorted({int(pid) for pid in ids})
+    grades = {}
+    for chunk in _chunked(unique_ids):
+        result = read_sql_query(STU_GRADES_QUERY, cnxn, params={"ids": chunk})
+        # Take the first active row (like TOP 1) if an ID has more than one
+        result = result.drop_duplicates(subset='ID', keep='first')
+        grades.update(zip(result['ID'].astype(int), result['GR'].astype(str)))
+    for pid in unique_ids:
+        if (grade := _grade_override(pid)) is not None:
+            grades[pid] = grade
+    return grades
+
+def _set_fast_executemany(conn, cursor, statement, parameters, context, executemany):
+    """before_cursor_execute hook: use pyodbc's fast_executemany for executemany calls."""
+    if executemany and hasattr(cursor, 'fast_executemany'):
+        cursor.fast_executemany = True
+
+def enable_fast_executemany(engine) -> None:
+    """Turn on fast_executemany for an engine whose driver supports it (pyodbc); no-op otherwise."""
+    if not event.contains(engine, 'before_cursor_execute', _set_fast_executemany):
+        event.listen(engine, 'before_cursor_execute', _set_fast_executemany)
+
+class UploadSession:
+    """
+    One connection and transaction scope for a whole upload run.
+    
+    Every statement runs inside a savepoint, so a failing record is rolled back on
+    its own while the rest of the open transaction survives. The transaction is
+    committed every `commit_every` rows, whenever `checkpoint()` is called (once
+    per school file) and when the session closes.
+    """
+    def __init__(self, engine, commit_every: Union[int, None] = None):
+        self.engine = engine
+        self.commit_every = commit_every
+        self.conn = None
+        self.uncommitted = 0
+    
+    def __enter__(self):
+        self.conn = self.engine.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.checkpoint()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+    
+    def execute(self, statement, params):
+        """Execute inside a savepoint; on error only this statement is rolled back and the error re-raised."""
+        with self.conn.begin_nested():
+            result = self.conn.execute(statement, params)
+            if result.returns_rows:
+                # Buffer OUTPUT rows before the savepoint closes; without MARS the
+                # connection cannot run anything else while results are pending
+                result = result.freeze()()
+        self.uncommitted += len(params) if isinstance(params, list) else 1
+        if self.commit_every and self.uncommitted >= self.commit_every:
+            self.checkpoint()
+        return result
+    
+    def checkpoint(self) -> None:
+        """Commit everything executed since the last checkpoint."""
+        if self.conn.in_transaction():
+            self.conn.commit()
+            core.log(f"Committed {self.uncommitted} records")
+        self.uncommitted = 0
+
+class HrnRecord(NamedTuple):
+    """One HRN row; field names match the INSERT_HRN parameters."""
+    PID: int
+    SQ: Union[int, None]
+    GR: Union[int, None]
+    SR: str
+    SL: str
+    PF: str
+    TD: Union[datetime, None]
+    SCL: Union[int, None]
+    IN: str
+
+def _column_values(column: Series) -> list:
+    """Python values of a column, with missing entries as None."""
+    return column.astype(object).where(column.notna(), None).tolist()
+
+@timer.timed()
+def hrn_records(data: DataFrame) -> list:
+    """
+    Builds an HrnRecord per row of validated roster data from whole columns at once,
+    instead of a pandas Series per row. SQ is left as None and GR holds the file's
+    grade (None when the file has none); the loaders fill both in.
+    
+    Args:
+        data (DataFrame): Rows to upload, with validated Student_IDs.
+    
+    Returns:
+        list: HrnRecord objects in row order.
+    """
+    status = data['Status'].astype(str).tolist()
+    return list(map(HrnRecord._make, zip(
+        data['Student_ID'].tolist(),
+        repeat(None),
+        _column_values(data['Grade']),
+        status,
+        status,
+        status,
+        _column_values(data['File_Date']),
+        _column_values(data['SC'].astype('Int32')),
+        repeat('4RH'),
+    )))
+
+@timer.timed()
+def insert_hrn_batch(records: list, session: UploadSession, chunk_size: int = 500) -> tuple:
+    """
+    Inserts HRN rows through executemany in chunks of `chunk_size`. If a chunk fails
+    its savepoint is rolled back and the chunk is retried row by row, so a single
+    bad record only costs itself, as in the per-row upload.
+    
+    Args:
+        records (list): HrnRecord objects with SQ and GR filled in.
+        session (UploadSession): Open upload session.
+        chunk_size (int): Rows sent per executemany call.
+    
+    Returns:
+        tuple: (success_count, error_count)
+    """
+    enable_fast_executemany(session.engine)
+    statement = text(sql.INSERT_HRN)
+    success_count = 0
+    error_count = 0
+    
+    for chunk in _chunked([record._asdict() for record in records], chunk_size):
+        try:
+            session.execute(statement, chunk)
+            success_count += len(chunk)
+            core.log(f"Inserted batch of {len(chunk)} records")
+            continue
+        except Exception as e:
+            core.log(f"ERROR inserting batch of {len(chunk)} records, retrying row by row: {e}")
+        
+        for params in chunk:
+            try:
+                session.execute(statement, params)
+                success_count += 1
+            except Exception as e:
+                core.log(f"ERROR inserting student {params['PID']} (TD {params['TD']}): {e}")
+                error_count += 1
+    
+    return success_count, error_count
+
+@timer.timed()
+def merge_hrn_stage(records: list, session: UploadSession, chunk_size: int = 500) -> tuple:
+    """
+    Set-based load: bulk-loads the records into the #HRN_STAGE temp table, then one
+    INSERT...SELECT (SQL/MERGE_HRN_STAGE.sql) assigns SQ as MAX(SQ) + ROW_NUMBER()
+    per PID, skips (PID, TD) pairs already in HRN and inserts the rest, returning
+    one OUTPUT row per inserted record.
+    
+    Args:
+        records (list): HrnRecord objects with GR filled in; SQ is ignored.
+        session (UploadSession): Open upload session (the temp table lives on its connection).
+        chunk_size (int): Rows sent per executemany call while staging.
+    
+    Returns:
+        tuple: (success_count, duplicate_count, error_count)
+    """
+    enable_fast_executemany(session.engine)
+    columns = ['PID', 'GR', 'SR', 'SL', 'PF', 'TD', 'SCL', 'IN']
+    staged = [dict(zip(columns, (record.PID, record.GR, record.SR, record.SL, record.PF, record.TD, record.SCL, record.IN)), RN=rn)
+              for rn, record in enumerate(records, start=1)]
+    
+    try:
+        session.execute(text(sql.CREATE_HRN_STAGE), {})
+        for chunk in _chunked(staged, chunk_size):
+            session.execute(text(sql.INSERT_HRN_STAGE), chunk)
+        # Count the OUTPUT rows: pyodbc reports rowcount -1 when NOCOUNT is on
+        inserted = len(session.execute(text(sql.MERGE_HRN_STAGE), {}).fetchall())
+    except Exception as e:
+        core.log(f"ERROR loading {len(staged)} staged records into HRN: {e}")
+        return 0, 0, len(staged)
+    
+    core.log(f"Staged {len(staged)} records, inserted {inserted}")
+    return inserted, len(staged) - inserted, 0
+
+class UploadCounts:
+    """Upload outcome totals, overall and per source workbook, safe to update from several upload threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.success = 0
+        self.duplicate = 0
+        self.error = 0
+        self.skipped = 0
+        self.by_file = {}
+    
+    def add(self, success: int = 0, duplicate: int = 0, error: int = 0, skipped: int = 0,
+            file: Union[str, None] = None) -> None:
+        with self._lock:
+            self.success += success
+            self.duplicate += duplicate
+            self.error += error
+            self.skipped += skipped
+            if file is not None:
+                totals = self.by_file.setdefault(file, {'success': 0, 'duplicate': 0, 'error': 0, 'skipped': 0})
+                totals['success'] += success
+                totals['duplicate'] += duplicate
+                totals['error'] += error
+                totals['skipped'] += skipped
+
+def upload_rows(data: DataFrame, session: UploadSession, counts: UploadCounts, existing_mask: Series,
+                sq_by_pid: dict, db_grades: dict, upload_mode: str = 'row', batch_size: int = 500,
+                per_file_commit: bool = True) -> None:
+    """
+    Builds an HrnRecord for each row of `data` (see hrn_records) and inserts them
+    through `session` using `upload_mode`, adding the outcome to `counts`.
+    
+    Args:
+        data (DataFrame): Rows to upload, in workbook order, with validated Student_IDs and Source_File.
+        session (UploadSession): Open upload session.
+        counts (UploadCounts): Totals shared across workers.
+        existing_mask (Series): True for rows already in HRN (see find_existing_hrn_records).
+        sq_by_pid (dict): Current MAX(SQ) per PID; advanced as rows are inserted.
+        db_grades (dict): STU grades for rows without a file grade.
+        upload_mode (str): 'row', 'batch', 'merge' or 'atomic'.
+        batch_size (int): Rows per executemany call in batch/merge mode.
+        per_file_commit (bool): Commit at every workbook (Source_File) boundary.
+    """
+    skipped_count = 0
+    error_count = 0
+    success_count = 0
+    duplicate_count = 0
+    pending_records = []
+    uploaded_keys = set()
+    current_file = None
+
+    def add_file_counts():
+        """Adds the current workbook's outcome to `counts` and starts the next one from zero."""
+        nonlocal success_count, duplicate_count, error_count, skipped_count
+        counts.add(success=success_count, duplicate=duplicate_count, error=error_count, skipped=skipped_count,
+                   file=current_file)
+        success_count = duplicate_count = error_count = skipped_count = 0
+
+    def finish_file():
+        """Send any queued batch records, then commit if committing per file."""
+        nonlocal success_count, duplicate_count, error_count
+        if pending_records and upload_mode == 'merge':
+            inserted, duplicates, failed = merge_hrn_stage(pending_records, session, chunk_size=batch_size)
+            success_count += inserted
+            duplicate_count += duplicates
+            error_count += failed
+            pending_records.clear()
+        elif pending_records:
+            core.log(f"Inserting {len(pending_records)} records in batches of {batch_size}")
+            inserted, failed = insert_hrn_batch(pending_records, session, chunk_size=batch_size)
+            success_count += inserted
+            error_count += failed
+            pending_records.clear()
+        if per_file_commit:
+            session.checkpoint()
+        add_file_counts()
+
+    records = hrn_records(data)
+    # Commit boundaries follow the workbook, not the school: a school can send more than one
+    source_files = data['Source_File'].astype(str).tolist()
+    names = (data['First_Name'].astype(str) + ' ' + data['Last_Name'].astype(str)).tolist()
+    existing = existing_mask.loc[data.index].tolist()
+
+    try:
+        for record, source_file, name, exists in zip(records, source_files, names, existing):
+            if source_file != current_file:
+                if current_file is not None:
+                    finish_file()
+                current_file = source_file
+
+            # Check for duplicate before proceeding
+            if exists or (record.PID, record.TD) in uploaded_keys:
+                core.log(f"DUPLICATE: Student {record.PID} ({name}) already has a record for date {record.TD} - skipping")
+                duplicate_count += 1
+                continue
+
+            if upload_mode not in ('merge', 'atomic'):
+                record = record._replace(SQ=sq_by_pid.get(record.PID, 0) + 1)
+
+            # Use the grade from the Excel file (already converted to int); for middle
+            # schools or missing grades, fall back to the STU grade
+            if record.GR is None:
+                db_grade = db_grades.get(record.PID)
+                if db_grade is None:
+                    # Last resort: Skip this record
+                    core.log(f"WARNING: No grade found for student {record.PID} ({name}), skipping record")
+                    skipped_count += 1
+                    continue  # Skip this student
+                record = record._replace(GR=int(db_grade))
+
+            if upload_mode in ('batch', 'merge'):
+                # Claim the key and sequence number now; a row that later fails to insert
+                # leaves a harmless gap in SQ for that student
+                core.log(f'Queued record: {record}')
+                pending_records.append(record)
+                uploaded_keys.add((record.PID, record.TD))
+                if record.SQ is not None:
+                    sq_by_pid[record.PID] = record.SQ
+                continue
+
+            if upload_mode == 'atomic':
+                try:
+                    with timer.stage('insert_hrn_atomic'):
+                        inserted_sq = session.execute(text(sql.INSERT_HRN_ATOMIC), record._asdict()).scalar()
+                except Exception as e:
+                    core.log(f"ERROR inserting student {record.PID} ({name}): {e}")
+                    error_count += 1
+                    continue
+                if inserted_sq is None:
+                    core.log(f"DUPLICATE: Student {record.PID} ({name}) already has a record for date {record.TD} - skipping")
+                    duplicate_count += 1
+                else:
+                    core.log(f"Inserted record with SQ {inserted_sq}: {record}")
+                    success_count += 1
+                    uploaded_keys.add((record.PID, record.TD))
+                continue
+
+            core.log(f'Inserting record: {record}')
+
+            try:
+                with timer.stage('insert_hrn'):
+                    session.execute(text(sql.INSERT_HRN), record._asdict())
+                success_count += 1
+                uploaded_keys.add((record.PID, record.TD))
+                sq_by_pid[record.PID] = record.SQ
+            except Exception as e:
+                core.log(f"ERROR inserting student {record.PID} ({name}): {e}")
+                error_count += 1
+                continue  # Continue with next student
+
+        finish_file()
+    finally:
+        # Whatever the workbook in progress got through before an exception
+        add_file_counts()
+
+def upload_in_parallel(data: DataFrame, engine, counts: UploadCounts, workers: int,
+                       commit_every: Union[int, None] = None, **upload_kwargs) -> None:
+    """
+    Shards `data` by PID and uploads each shard on a bounded thread pool, every
+    worker with its own UploadSession (and pooled connection). A student's rows
+    always land in the same shard, so only one worker ever advances their SQ.
+    
+    Args:
+        data (DataFrame): Rows to upload.
+        engine: SQLAlchemy engine to draw connections from.
+        counts (UploadCounts): Totals shared across workers.
+        workers (int): Number of threads / shards.
+        commit_every (int | None): Passed to each worker's UploadSession.
+        **upload_kwargs: Remaining upload_rows arguments.
+    """
+    pids = data['Student_ID'].astype('int64')
+    shards = [shard for _, shard in data.groupby(pids % workers, sort=True)]
+    core.log(f"Uploading {len(data)} rows in {len(shards)} PID shards on {workers} workers")
+    
+    def upload_shard(shard: DataFrame) -> None:
+        with UploadSession(engine, commit_every=commit_every) as session:
+            upload_rows(shard, session, counts, **upload_kwargs)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(upload_shard, shard) for shard in shards]:
+            future.result()
+
+# Async drivers for the sync dialects the upload runs against
+ASYNC_DRIVERS = {
+    'mssql': 'mssql+aioodbc',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+@timer.timed('upload_row_async')
+async def _upload_row_async(conn, record: HrnRecord, name: str, counts: UploadCounts, source_file: str = None) -> None:
+    """
+    Async counterpart of one upload_rows iteration: duplicate check, grade, SQ and insert
+    in one transaction, using the batch path's queries with a one-student ID list.
+    """
+    try:
+        async with conn.begin():
+            result = await conn.execute(HRN_KEYS_QUERY, {"pids": [record.PID]})
+            if any(to_datetime(test_date) == record.TD for _, test_date in result):
+                core.log(f"DUPLICATE: Student {record.PID} ({name}) already has a record for date {record.TD} - skipping")
+                counts.add(duplicate=1, file=source_file)
+                return
+            
+            if record.GR is None:
+                grade = _grade_override(record.PID)
+                if grade is None:
+                    # First active STU row, as get_grades_from_ids keeps
+                    stu_row = (await conn.execute(STU_GRADES_QUERY, {"ids": [record.PID]})).first()
+                    grade = stu_row.GR if stu_row is not None else None
+                if grade is None:
+                    core.log(f"WARNING: No grade found for student {record.PID} ({name}), skipping record")
+                    counts.add(skipped=1, file=source_file)
+                    return
+                record = record._replace(GR=int(grade))
+            
+            max_sq_row = (await conn.execute(HRN_MAX_SQ_QUERY, {"pids": [record.PID]})).first()
+            record = record._replace(SQ=(int(max_sq_row.SQ) if max_sq_row is not None else 0) + 1)
+            
+            core.log(f'Inserting record: {record}')
+            await conn.execute(text(sql.INSERT_HRN), record._asdict())
+        counts.add(success=1, file=source_file)
+    except Exception as e:
+        core.log(f"ERROR inserting student {record.PID} ({name}): {e}")
+        counts.add(error=1, file=source_file)
+
+async def upload_rows_async(data: DataFrame, engine, counts: UploadCounts, concurrency: int = 8,
+                            async_engine=None) -> None:
+    """
+    Async variant of upload_rows with the same per-row semantics (skip duplicates,
+    fall back to the STU grade, isolate row errors), using an async engine on the
+    same database. Students are uploaded concurrently, at most
+    `concurrency` at a time, each on its own connection; a student's rows run in
+    order so their SQ values stay consecutive.
+    
+    Args:
+        data (DataFrame): Rows to upload.
+        engine: Sync SQLAlchemy engine whose URL is reused with the async driver.
+        counts (UploadCounts): Totals to add the outcome to.
+        concurrency (int): Maximum students in flight at once.
+        async_engine: Ready-made AsyncEngine to use instead of deriving one from
+            `engine` (e.g. local_db.create_local_async_engine); the caller disposes it.
+    """
+    owns_engine = async_engine is None
+    if owns_engine:
+        backend = engine.url.get_backend_name()
+        try:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            async_engine = create_async_engine(engine.url.set(drivername=ASYNC_DRIVERS[backend]), pool_size=concurrency)
+        except (KeyError, ImportError) as e:
+            core.log(f"ERROR: No async driver available for '{backend}' (needs sqlalchemy[asyncio] and aioodbc for SQL Server): {e}")
+            return
+    probe.attach(async_engine.sync_engine)
+    
+    names = (data['First_Name'].astype(str) + ' ' + data['Last_Name'].astype(str)).tolist()
+    source_files = data['Source_File'].astype(str).tolist()
+    students = {}
+    for record, name, source_file in zip(hrn_records(data), names, source_files):
+        students.setdefault(record.PID, []).append((record, name, source_file))
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def upload_student(rows: list) -> None:
+        async with semaphore:
+            async with async_engine.connect() as conn:
+                for record, name, source_file in rows:
+                    await _upload_row_async(conn, record, name, counts, source_file)
+    
+    core.log(f"Uploading {len(students)} students with up to {concurrency} in flight")
+    try:
+        await asyncio.gather(*(upload_student(rows) for rows in students.values()))
+    finally:
+        probe.detach(async_engine.sync_engine)
+        if owns_engine:
+            await async_engine.dispose()
+
+def upload_data(data: DataFrame, engine, counts: UploadCounts, upload_mode: str = 'row', batch_size: int = 500,
+                commit_every: str = 'file', workers: int = 1) -> None:
+    """
+    Runs the batch lookups the chosen mode needs (duplicates, MAX(SQ), STU grades)
+    and uploads `data` on one UploadSession, or on `workers` PID-sharded sessions.
+    
+    Args:
+        data (DataFrame): Final rows to upload.
+        engine: SQLAlchemy engine.
+        counts (UploadCounts): Totals to add the outcome to.
+        upload_mode (str): 'row', 'batch', 'merge' or 'atomic'.
+        batch_size (int): Rows per executemany call in batch/merge mode.
+        commit_every (str): 'file' to commit per school workbook, or a row count.
+        workers (int): Upload threads; 1 uploads serially.
+    """
+    per_file_commit = commit_every.lower() == 'file'
+    batch_pids = data['Student_ID'].astype('int64')
+    if upload_mode in ('merge', 'atomic'):
+        # Duplicates and SQ are resolved server-side by MERGE_HRN_STAGE / INSERT_HRN_ATOMIC
+        existing_mask = Series(False, index=data.index)
+        sq_by_pid = {}
     else:
-        return 1
+        # Resolve duplicates for the whole batch up front; pairs inserted during
+        # this run are tracked separately so repeated rows in the input are still caught
+        existing_mask = find_existing_hrn_records(data['Student_ID'], data['File_Date'], engine)
+        core.log(f"Found {int(existing_mask.sum())} rows already present in HRN")
 
-def get_grade_from_id(id:int, cnxn) -> Union[str, None]:
-    """Get the grade for a given student ID."""
-    id_override_dict = {
-        113507: '8',
-    }
-    if id in id_override_dict.keys():
-        core.log(f'Overriding grade for ID {id} to {id_override_dict[id]}')
-        return id_override_dict[id]
-    query = "SELECT TOP 1 GR FROM STU WHERE DEL = 0 AND TG = '' AND ID = :id"
-    result = read_sql_query(text(query), cnxn, params={"id": id})
-    if not result.empty:
-        grade = result['GR'].iloc[0]
-        return str(grade)
+        # Current MAX(SQ) per student for the whole batch; advanced in memory as rows are
+        # inserted so a student appearing more than once gets consecutive sequence numbers
+        sq_by_pid = get_max_sq_by_pid(batch_pids.tolist(), engine)
+
+    # Grades from STU for every row the file did not supply one for (all middle school rows)
+    missing_grade_pids = batch_pids[~notna(data.loc[batch_pids.index, 'Grade'])]
+    db_grades = get_grades_from_ids(missing_grade_pids.tolist(), engine)
+
+    upload_kwargs = dict(existing_mask=existing_mask, sq_by_pid=sq_by_pid, db_grades=db_grades,
+                         upload_mode=upload_mode, batch_size=batch_size, per_file_commit=per_file_commit)
+    session_commit_every = None if per_file_commit else int(commit_every)
+    if workers > 1:
+        upload_in_parallel(data, engine, counts, workers, commit_every=session_commit_every, **upload_kwargs)
     else:
+        with UploadSession(engine, commit_every=session_commit_every) as session:
+            upload_rows(data, session, counts, **upload_kwargs)
+
+@timer.timed()
+def find_existing_hrn_records(pids: Series, test_dates: Series, cnxn) -> Series:
+    """
+    Resolves every (PID, TD) pair against HRN in chunked set queries instead of
+    one round trip per row.
+    
+    Args:
+        pids (Series): Student IDs, one per row to be uploaded.
+        test_dates (Series): Test dates aligned with `pids`.
+        cnxn: SQLAlchemy engine or connection.
+    
+    Returns:
+        Series: Boolean mask (same index as `pids`) that is True where HRN already
+        has a record for that student on that test date.
+    """
+    pid_values = to_numeric(pids.astype(str).str.strip(), errors='coerce')
+    td_values = to_datetime(test_dates)
+    unique_pids = sorted(int(pid) for pid in pid_values.dropna().unique())
+    
+    existing = [read_sql_query(HRN_KEYS_QUERY, cnxn, params={"pids": chunk}) for chunk in _chunked(unique_pids)]
+    existing = concat(existing, ignore_index=True) if existing else DataFrame(columns=['PID', 'TD'])
+    if existing.empty:
+        return Series(False, index=pids.index)
+    
+    existing_keys = MultiIndex.from_arrays([
+        to_numeric(existing['PID']).astype('float64'),
+        to_datetime(existing['TD']),
+    ])
+    row_keys = MultiIndex.from_arrays([pid_values.astype('float64'), td_values])
+    return Series(row_keys.isin(existing_keys), index=pids.index)
+
+# Compact dtypes for the standardized roster columns, applied to each file as it is loaded.
+# Columns missing from a frame (e.g. DOB with EARLY_FILTER) are left alone.
+ROSTER_DTYPES = {
+    'Status': 'category',
+    'School_Name': 'category',
+    'Sheet_Name': 'category',
+    'SC': 'category',
+    'Student_ID': 'Int32',
+    'Grade': 'Int8',
+    'File_Date': 'datetime64',
+    'DOB': 'datetime64',
+}
+INT32_MAX = 2**31 - 1
+
+# Roster grade spellings that are not numbers
+GRADE_ALIASES = {
+    'K': 0,
+    'TK': -1, 'T-K': -1, 'T K': -1,
+    'PS': -2, 'P-S': -2, 'P S': -2, 'PRESCHOOL': -2,
+}
+
+def _grade_value(spelled: str) -> Union[int, None]:
+    """Integer grade of one stripped, upper-cased spelling, or None if it has none."""
+    if spelled in GRADE_ALIASES:
+        return GRADE_ALIASES[spelled]
+    try:
+        value = int(float(spelled))
+    except (ValueError, OverflowError):
         return None
+    return value if -128 <= value <= 127 else None
 
-def check_duplicate_exists(pid: int, test_date, cnxn) -> bool:
-    """Check if a record already exists for the given PID and test date."""
-    query = "SELECT COUNT(*) as cnt FROM HRN WHERE PID = :pid AND TD = :test_date"
-    result = read_sql_query(text(query), cnxn, params={"pid": pid, "test_date": test_date})
-    if not result.empty and result['cnt'].iloc[0] > 0:
-        return True
-    return False
+@timer.timed()
+def normalize_grades(grades: Series, counted: Series = None) -> Series:
+    """
+    Converts roster grades to integers (K=0, TK=-1, PS=-2) for a whole column at
+    once. Numeric text such as "5.0" is truncated to an int. Values that can't be
+    converted become <NA> and are reported in a single warning with their counts.
+    
+    Args:
+        grades (Series): Raw Grade column.
+        counted (Series): Boolean mask of the rows the warning counts (e.g. rows that
+            will be uploaded); all rows by default.
+    
+    Returns:
+        Series: Nullable Int8 grades.
+    """
+    # Rosters repeat a handful of spellings, so convert each distinct value once in
+    # plain Python and spread the results over the rows with one take
+    codes, uniques = factorize(grades)
+    values = []
+    bad = {}
+    for position, grade in enumerate(uniques):
+        spelled = str(grade).strip()
+        value = _grade_value(spelled.upper()) if spelled else None
+        if spelled and value is None:
+            bad[position] = spelled
+        values.append(value)
+    values = Series(values, dtype='Int8')
+    
+    if bad:
+        kept = codes >= 0 if counted is None else (codes >= 0) & counted.to_numpy(dtype=bool)
+        rows = bincount(codes[kept], minlength=len(uniques))
+        totals = {}
+        for position, spelled in bad.items():
+            totals[spelled] = totals.get(spelled, 0) + int(rows[position])
+        totals = sorted(((spelled, count) for spelled, count in totals.items() if count),
+                        key=lambda item: item[1], reverse=True)
+        if totals:
+            listed = ', '.join(f"'{spelled}' ({count})" for spelled, count in totals)
+            core.log(f"WARNING: Could not convert {sum(count for _, count in totals)} grade values "
+                     f"to integer, using None: {listed}")
+    return Series(values.array.take(codes, allow_fill=True), index=grades.index)
 
-def main():
-    data: DataFrame = DataFrame()
+@timer.timed()
+def validate_student_ids(ids: Series) -> tuple:
+    """
+    Coerces a raw Student_ID column to nullable Int32 in one pass and records why
+    each rejected value failed: missing (blank or whitespace), not a number, not a
+    whole number, or out of range. Excel numbers such as 12345.0 and IDs padded
+    with spaces are accepted as the integer they hold.
     
-    # Read and clean nurse info CSV
-    nurse_info = read_csv('nurses_and_dates.csv')
-    nurse_info.columns = nurse_info.columns.str.strip()
+    Args:
+        ids (Series): Raw Student_ID column.
     
-    core.log("Starting to process Excel files...")
+    Returns:
+        tuple: (Int32 Series with <NA> for rejected IDs, Series of reasons with None for valid IDs)
+    """
+    stripped = ids.astype(str).str.strip()
+    numbers = to_numeric(stripped, errors='coerce')
+    missing = ids.isna() | (stripped == '')
+    not_number = ~missing & numbers.isna()
+    out_of_range = numbers.notna() & ~numbers.between(1, INT32_MAX)
+    not_whole = numbers.notna() & ~out_of_range & (numbers % 1 != 0)
     
-    for file in os.listdir('./in'):
-        if not file.endswith('.xlsx'): 
+    reasons = (Series(None, index=ids.index, dtype=object)
+               .mask(missing, 'missing')
+               .mask(not_number, "not a number: '" + stripped + "'")
+               .mask(not_whole, "not a whole number: '" + stripped + "'")
+               .mask(out_of_range, "out of range: '" + stripped + "'"))
+    return numbers.where(reasons.isna()).astype('Int32'), reasons
+
+def apply_roster_dtypes(df: DataFrame) -> DataFrame:
+    """
+    Casts a roster frame to ROSTER_DTYPES in place. Status is normalized (stripped,
+    upper-cased), Grade converted with normalize_grades, and Student_ID checked with
+    validate_student_ids, adding an ID_Error column with the reason for rejected IDs.
+
+    Args:
+        df (DataFrame): Standardized rows with metadata columns added.
+
+    Returns:
+        DataFrame: The same frame, for chaining.
+    """
+    if 'Status' in df.columns:
+        df['Status'] = df['Status'].astype(str).str.strip().str.upper()
+    if 'Grade' in df.columns:
+        # Only 'P' rows are uploaded, so only their unreadable grades are worth a warning
+        counted = df['Status'] == 'P' if 'Status' in df.columns else None
+        df['Grade'] = normalize_grades(df['Grade'], counted=counted)
+
+    for col, dtype in ROSTER_DTYPES.items():
+        if col not in df.columns:
             continue
-        
-        # Extract school name from filename
-        school_name = file.split(' ')[0]
-        
-        # Find matching nurse info
-        school_nurse_info = nurse_info[nurse_info['school'].str.contains(school_name, case=False, na=False)]
-        
-        if not school_nurse_info.empty:
-            date_str = school_nurse_info['date'].iloc[0]
-            file_date = dateparser.parse(date_str)
-            nurse = f"{school_nurse_info['nurse_first'].iloc[0]} {school_nurse_info['nurse_last'].iloc[0]}"
-            sc_code = school_nurse_info['sc'].iloc[0]
-            core.log(f"Processing {file}: Nurse={nurse}, Date={file_date}, SC={sc_code}")
+        if col == 'Student_ID':
+            df[col], df['ID_Error'] = validate_student_ids(df[col])
+        elif dtype == 'datetime64':
+            df[col] = to_datetime(df[col], errors='coerce', format='mixed')
         else:
-            file_date = None
-            nurse = None
-            sc_code = None
-            core.log(f"Warning: Could not find nurse info for {school_name}")
-        
-        # Read Excel file with standardized columns
-        full_path = os.path.join('./in', file)
-        temp_df = read_all_excel_sheets_standardized(full_path)
-        
-        if temp_df.empty:
-            core.log(f"Warning: No data extracted from {file}")
-            continue
-        
-        # Add metadata columns
-        temp_df['SC'] = sc_code
-        temp_df['File_Date'] = file_date
-        temp_df['Nurse'] = nurse
-        temp_df['School_Name'] = school_name
-        temp_df['Initials'] = ''.join([word[0] for word in nurse.split()]) if notna(nurse) and nurse else None
-        
-        core.log(f"Added {len(temp_df)} rows from {file}")
-        
-        # Concatenate to main dataframe
-        data = concat([data, temp_df], ignore_index=True)
+            df[col] = df[col].astype(dtype)
+    return df
+
+def match_nurse_info(nurse_info: DataFrame, file: str) -> DataFrame:
+    """The nurses_and_dates.csv row for a workbook (matched on the school name at the start of its file name), or no rows."""
+    school_name = file.split(' ')[0]
+    return nurse_info[nurse_info['school'].str.contains(school_name, case=False, na=False)].head(1)
+
+def _nurse_info_sha256(nurse_info: DataFrame, file: str) -> str:
+    """Hex SHA-256 of a workbook's nurses_and_dates.csv row, so an edited date, SC or nurse can be detected."""
+    return hashlib.sha256(match_nurse_info(nurse_info, file).to_csv(index=False).encode()).hexdigest()
+
+def load_roster_file(file: str, nurse_info: DataFrame, sha256: str = None) -> DataFrame:
+    """
+    Reads one school roster workbook from ./in and adds the school's nurse, date and
+    SC metadata. Module-level so it can run in a ProcessPoolExecutor worker.
+    
+    Args:
+        file (str): Workbook file name inside ./in.
+        nurse_info (DataFrame): Cleaned nurses_and_dates.csv.
+        sha256 (str): The workbook's SHA-256 if already known.
+    
+    Returns:
+        DataFrame: Standardized rows for the file (empty if nothing was extracted).
+    """
+    # Extract school name from filename
+    school_name = file.split(' ')[0]
+    
+    # Find matching nurse info
+    with timer.stage('nurse_lookup'):
+        school_nurse_info = match_nurse_info(nurse_info, file)
+    
+    if not school_nurse_info.empty:
+        date_str = school_nurse_info['date'].iloc[0]
+        file_date = dateparser.parse(date_str)
+        nurse = f"{school_nurse_info['nurse_first'].iloc[0]} {school_nurse_info['nurse_last'].iloc[0]}"
+        sc_code = school_nurse_info['sc'].iloc[0]
+        core.log(f"Processing {file}: Nurse={nurse}, Date={file_date}, SC={sc_code}")
+    else:
+        file_date = None
+        nurse = None
+        sc_code = None
+        core.log(f"Warning: Could not find nurse info for {school_name}")
+    
+    # Read Excel file with standardized columns
+    full_path = os.path.join('./in', file)
+    temp_df = read_all_excel_sheets_standardized(full_path, sha256=sha256)
     
-    core.log(f"Total rows before filtering: {len(data)}")
+    if temp_df.empty:
+        core.log(f"Warning: No data extracted from {file}")
+        return temp_df
+    
+    # Add metadata columns
+    temp_df['SC'] = sc_code
+    temp_df['File_Date'] = file_date
+    temp_df['Nurse'] = nurse
+    temp_df['School_Name'] = school_name
+    temp_df['Initials'] = ''.join([word[0] for word in nurse.split()]) if notna(nurse) and nurse else None
+    temp_df['Source_File'] = file
+    with timer.stage('apply_roster_dtypes'):
+        apply_roster_dtypes(temp_df)
+
+    core.log(f"Added {len(temp_df)} rows from {file}")
+    return temp_df
+
+def _load_roster_file_timed(file: str, nurse_info: DataFrame, sha256: str = None) -> tuple:
+    """load_roster_file for a worker process: returns the frame and the timings recorded while loading it."""
+    timer.drain()  # a forked worker starts with a copy of the parent's samples
+    temp_df = load_roster_file(file, nurse_info, sha256=sha256)
+    return temp_df, timer.drain()
 
-    # Strip whitespace from Status column and filter for only 'P' status rows
-    if not data.empty:
-        data['Status'] = data['Status'].astype(str).str.strip().str.upper()
-        data = data[data['Status'] == 'P']
-        core.log(f"Rows after filtering for 'P': {len(data)}")
+def iter_roster_frames(files: list, nurse_info: DataFrame, parse_workers: int = 1, digests: dict = None):
+    """
+    Yields (file, DataFrame) for each workbook in `files`, in that order. With
+    parse_workers > 1 the workbooks are parsed on a process pool; map() still
+    yields results in submission order, so the output matches a serial run. Stage
+    timings recorded in the workers are merged into this process's timer.
+    `digests` (file -> SHA-256) spares the roster cache from hashing files again.
+    """
+    digests = digests or {}
+    if parse_workers > 1:
+        # Workbook parsing is CPU-bound
+        core.log(f"Parsing {len(files)} workbooks on {parse_workers} processes")
+        with ProcessPoolExecutor(max_workers=parse_workers) as executor:
+            results = executor.map(_load_roster_file_timed, files, [nurse_info] * len(files),
+                                   [digests.get(file) for file in files])
+            for file, (temp_df, timings) in zip(files, results):
+                timer.merge(timings)
+                yield file, temp_df
+    else:
+        for file in files:
+            yield file, load_roster_file(file, nurse_info, sha256=digests.get(file))
+
+def combine_roster_frames(frames) -> tuple:
+    """
+    Collects per-file frames and concatenates them once at the end, so ingestion
+    cost grows linearly with the number of files instead of recopying the
+    accumulated data for every file.
+    
+    Args:
+        frames: Iterable of (file, DataFrame) pairs, e.g. from iter_roster_frames.
+    
+    Returns:
+        tuple: (combined DataFrame, dict of file -> rows read)
+    """
+    rows_read = {}
+    non_empty = []
+    for file, temp_df in frames:
+        rows_read[file] = len(temp_df)
+        if not temp_df.empty:
+            non_empty.append(temp_df)
+    data = concat(non_empty, ignore_index=True) if non_empty else DataFrame()
+    # Categoricals with different categories per file concatenate to plain text; re-cast once
+    for col, dtype in ROSTER_DTYPES.items():
+        if dtype == 'category' and col in data.columns:
+            data[col] = data[col].astype('category')
+    return data, rows_read
+
+# SQLite manifest of processed workbooks, used to skip files already uploaded
+MANIFEST_PATH = config('MANIFEST_PATH', default='ingest_manifest.sqlite')
+
+def open_manifest(path: str = MANIFEST_PATH) -> sqlite3.Connection:
+    """Opens (creating if needed) the ingestion manifest."""
+    manifest = sqlite3.connect(path)
+    manifest.execute("""
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime REAL,
+            sha256 TEXT,
+            rows_read INTEGER,
+            rows_final INTEGER,
+            outcome TEXT,
+            processed_at TEXT,
+            nurse_sha256 TEXT
+        )
+    """)
+    # Manifests written before the nurse row was tracked; their files are picked up again once
+    columns = [row[1] for row in manifest.execute("PRAGMA table_info(files)")]
+    if 'nurse_sha256' not in columns:
+        manifest.execute("ALTER TABLE files ADD COLUMN nurse_sha256 TEXT")
+    return manifest
+
+def select_changed_files(manifest: sqlite3.Connection, files: list, nurse_info: DataFrame,
+                         directory: str = './in') -> tuple:
+    """
+    Returns the workbooks that are new, changed, not fully uploaded, or whose
+    nurses_and_dates.csv row changed, according to the manifest. Size and mtime are
+    checked first; the content hash is only computed when they differ, so a
+    touched-but-identical file is still skipped (and its new size/mtime saved so it
+    is not hashed again next run).
+    
+    Args:
+        manifest (sqlite3.Connection): Open manifest.
+        files (list): Workbook file names inside `directory`.
+        nurse_info (DataFrame): Cleaned nurses_and_dates.csv.
+        directory (str): Folder holding the workbooks.
+    
+    Returns:
+        tuple: (subset of `files` to process, in the same order, dict of file -> SHA-256
+        for those files, to pass on instead of hashing them again)
+    """
+    changed = []
+    digests = {}
+    for file in files:
+        full_path = os.path.join(directory, file)
+        stat = os.stat(full_path)
+        entry = manifest.execute(
+            "SELECT size, mtime, sha256, nurse_sha256, outcome FROM files WHERE path = ?", (file,)
+        ).fetchone()
+        if entry is not None and (entry[0], entry[1]) == (stat.st_size, stat.st_mtime):
+            sha256 = entry[2]
+        else:
+            sha256 = _file_sha256(full_path)
+            if entry is not None and entry[2] == sha256:
+                manifest.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?", (stat.st_size, stat.st_mtime, file))
+        if (entry is None or entry[4] != 'uploaded' or entry[2] != sha256
+                or entry[3] != _nurse_info_sha256(nurse_info, file)):
+            changed.append(file)
+            digests[file] = sha256
+    manifest.commit()
+    core.log(f"Manifest: {len(changed)} of {len(files)} workbooks are new or changed")
+    return changed, digests
+
+def record_manifest(manifest: sqlite3.Connection, file: str, rows_read: int, rows_final: int, outcome: str,
+                    sha256: str = None, nurse_sha256: str = None, directory: str = './in') -> None:
+    """
+    Stores a workbook's current size, mtime, hash, nurse row hash, row counts and
+    outcome in the manifest. `sha256` is computed when not given.
+    """
+    full_path = os.path.join(directory, file)
+    stat = os.stat(full_path)
+    manifest.execute(
+        "INSERT OR REPLACE INTO files (path, size, mtime, sha256, rows_read, rows_final, outcome, processed_at, nurse_sha256) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (file, stat.st_size, stat.st_mtime, sha256 or _file_sha256(full_path), rows_read, rows_final, outcome,
+         datetime.now().isoformat(timespec='seconds'), nurse_sha256),
+    )
+    manifest.commit()
+
+def file_upload_outcome(rows_read: int, rows_final: int, invalid_ids: int, file_counts: dict) -> str:
+    """
+    Manifest outcome of an uploaded workbook: 'uploaded' when every final row was
+    inserted or already in HRN and no row was dropped for its Student_ID, 'partial'
+    when only some were, 'failed' when none were or no row could be read (the reader
+    logs and returns no rows on errors). Only 'uploaded' files are skipped on later runs.
+    
+    Args:
+        rows_read (int): The workbook's rows read before filtering.
+        rows_final (int): The workbook's rows handed to the upload.
+        invalid_ids (int): Its rows written to missing_ids.csv.
+        file_counts (dict): Its UploadCounts.by_file entry (success/duplicate/error/skipped).
+    
+    Returns:
+        str: 'uploaded', 'partial' or 'failed'.
+    """
+    if not rows_read:
+        return 'failed'
+    done = file_counts.get('success', 0) + file_counts.get('duplicate', 0)
+    if done == rows_final and not invalid_ids and not file_counts.get('error') and not file_counts.get('skipped'):
+        return 'uploaded'
+    return 'partial' if done else 'failed'
+
+# Stage timings and row/upload counts are written here at the end of every run
+RUN_REPORT_PATH = config('RUN_REPORT', default='run_report.json')
+
+def log_round_trips(top: int = 10) -> None:
+    """Logs the run's database round trips and its `top` most frequent statements."""
+    statements = probe.statements()
+    core.log(f"Database round trips: {probe.round_trips} ({probe.errors} failed, {len(statements)} distinct statements)")
+    for fingerprint, stats in list(statements.items())[:top]:
+        core.log(f"  {stats['calls']:>7} x  p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms  "
+                 f"p99 {stats['p99_ms']:.1f} ms  {fingerprint[:120]}")
+
+def main(parse_workers: int = 1, full: bool = False):
+    started = datetime.now()
+    timer.reset()
+    probe.reset()
+    report = {'options': {'parse_workers': parse_workers, 'full': full, 'excel_engine': EXCEL_ENGINE,
+                          'early_filter': EARLY_FILTER}}
+    try:
+        with timer.stage('total'):
+            _run(report, parse_workers=parse_workers, full=full)
+    finally:
+        log_round_trips()
+        write_run_report(RUN_REPORT_PATH, started, **report)
+        core.log(f"Saved run report to {RUN_REPORT_PATH}")
+
+def _run(report: dict, parse_workers: int = 1, full: bool = False) -> None:
+    """The body of main(); adds row counts and the upload outcome to `report` as it goes."""
+    # Read and clean nurse info CSV
+    with timer.stage('read_nurse_info'):
+        nurse_info = read_csv('nurses_and_dates.csv')
+        nurse_info.columns = nurse_info.columns.str.strip()
+    
+    core.log("Starting to process Excel files...")
     
-    # CRITICAL: Save and remove rows with missing Student_ID
-    initial_count = len(data)
-    missing_id_rows = data[~notna(data['Student_ID']) | (data['Student_ID'] == '')]
-    data = data[notna(data['Student_ID']) & (data['Student_ID'] != '')]
-    removed_count = initial_count - len(data)
+    # Sorted so out.csv has the same row order for serial and parallel parsing
+    files = sorted(file for file in os.listdir('./in') if file.endswith('.xlsx'))
+    
+    # Only new or changed workbooks (or ones not fully uploaded) unless --full
+    manifest = open_manifest()
+    digests = {}
+    if not full:
+        with timer.stage('select_changed_files'):
+            files, digests = select_changed_files(manifest, files, nurse_info)
+    report['files'] = len(files)
+    if not files:
+        core.log("No new or changed workbooks in ./in, nothing to do")
+        manifest.close()
+        return
+    # Hash each workbook once; the roster cache and the manifest both reuse it
+    for file in files:
+        if file not in digests:
+            digests[file] = _file_sha256(os.path.join('./in', file))
+    
+    with timer.stage('ingest'):
+        data, rows_read = combine_roster_frames(iter_roster_frames(files, nurse_info, parse_workers=parse_workers,
+                                                                   digests=digests))
+    
+    if EARLY_FILTER:
+        # Other statuses were dropped sheet by sheet while reading, so this is not a pre-filter count
+        core.log(f"Total 'P' rows read (EARLY_FILTER): {len(data)}")
+        report['rows'] = {'read_status_p': len(data)}
+    else:
+        core.log(f"Total rows before filtering: {len(data)}")
+        report['rows'] = {'read': len(data)}
+
+    with timer.stage('filter'):
+        # No selected workbook had rows (combine_roster_frames returns a bare frame);
+        # skip straight to the manifest so the failed files are recorded and retried
+        if data.empty:
+            initial_count = 0
+            missing_id_rows = DataFrame()
+        else:
+            # Status is normalized at ingestion; keep only 'P' rows
+            data = data[data['Status'] == 'P']
+            core.log(f"Rows after filtering for 'P': {len(data)}")
+
+            # CRITICAL: Save and remove rows whose Student_ID is missing or invalid (see validate_student_ids)
+            initial_count = len(data)
+            invalid_ids = data['ID_Error'].notna()
+            missing_id_rows = data[invalid_ids].rename(columns={'ID_Error': 'Reason'})
+            data = data[~invalid_ids].drop(columns='ID_Error')
+        removed_count = initial_count - len(data)
     
     if removed_count > 0:
-        core.log(f"WARNING: Found {removed_count} rows with missing Student_ID")
+        core.log(f"WARNING: Found {removed_count} rows with missing or invalid Student_ID")
         # Save missing ID rows to CSV
         missing_id_rows.to_csv('missing_ids.csv', index=False)
-        core.log(f"Saved rows with missing Student_IDs to 'missing_ids.csv'")
-    
-    # Convert Grade to integer format
-    def convert_grade_to_int(grade):
-        """Convert grade values to integers. K=0, TK=-1, PS=-2"""
-        if not notna(grade) or grade is None:
-            return None
-        
-        # Convert to string and strip whitespace
-        grade_str = str(grade).strip().upper()
-        
-        # Handle special cases
-        if grade_str == 'K':
-            return 0
-        if grade_str in ['TK', 'T-K', 'T K']:
-            return -1
-        if grade_str in ['PS', 'P-S', 'P S', 'PRESCHOOL']:
-            return -2
-        
-        # Try to convert to integer
-        try:
-            # Handle float strings like "5.0"
-            grade_float = float(grade_str)
-            return int(grade_float)
-        except (ValueError, TypeError):
-            core.log(f"WARNING: Could not convert grade '{grade}' to integer, returning None")
-            return None
-    
-    # Apply grade conversion
-    data['Grade'] = data['Grade'].apply(convert_grade_to_int)
-    core.log(f"Converted grades to integer format (K=0, TK=-1, PS=-2)")
+        core.log(f"Saved rows with missing or invalid Student_IDs to 'missing_ids.csv'")
     
     core.log(f"Final row count for processing: {len(data)}")
+    report['rows'].update(status_p=initial_count, invalid_id=removed_count, final=len(data))
     
     # Save to CSV
-    data.to_csv('out.csv', index=False)
+    with timer.stage('write_out_csv'):
+        data.to_csv('out.csv', index=False)
     core.log(f"Saved output to out.csv with {len(data)} rows and {len(data.columns)} columns")
     core.log(f"Columns: {data.columns.tolist()}")
     
     # Upload to database if enabled
     if upload := config('UPLOAD', default='False', cast=bool):
         print(f'{upload = }')
-        skipped_count = 0
-        error_count = 0
-        success_count = 0
-        duplicate_count = 0
-
-        for index, row in data.iterrows():
-            # Safety check: Skip rows with missing Student_ID
-            if not notna(row['Student_ID']) or row['Student_ID'] == '':
-                core.log(f"Skipping row {index} - missing Student_ID")
-                skipped_count += 1
-                continue
-            
-            params = {}
-            try:
-                params['PID'] = int(row['Student_ID'])
-            except (ValueError, TypeError) as e:
-                core.log(f"ERROR: Invalid Student_ID '{row['Student_ID']}' at row {index}: {e}")
-                error_count += 1
-                continue
+        counts = UploadCounts()
 
-            # Check for duplicate before proceeding
-            if check_duplicate_exists(params['PID'], row['File_Date'], cnxn):
-                core.log(f"DUPLICATE: Student {params['PID']} ({row['First_Name']} {row['Last_Name']}) already has a record for date {row['File_Date']} - skipping")
-                duplicate_count += 1
-                continue
+        # 'row' inserts each record as it is built; 'batch' collects a school file's
+        # records and sends INSERT_BATCH_SIZE rows per executemany call; 'merge' stages
+        # them in #HRN_STAGE and lets the server dedupe and assign SQ in one statement;
+        # 'atomic' inserts row by row with INSERT_HRN_ATOMIC, which dedupes and assigns SQ inline;
+        # 'async' overlaps the per-row lookups and inserts of up to UPLOAD_CONCURRENCY students
+        upload_mode = config('UPLOAD_MODE', default='row').lower()
+        batch_size = config('INSERT_BATCH_SIZE', default=500, cast=int)
+        # 'file' commits once per school workbook, a number N commits every N rows
+        commit_every = config('COMMIT_EVERY', default='file')
+        # More than one worker shards the upload by PID across a thread pool
+        upload_workers = config('UPLOAD_WORKERS', default=1, cast=int)
 
-            params['SQ'] = get_next_sq(params['PID'], cnxn, table='HRN')
-            
-            # FIXED: Handle grade properly (already converted to int in preprocessing)
-            # First, try to use grade from the Excel file (already converted to int)
-            if notna(row['Grade']) and row['Grade'] is not None:
-                params['GR'] = int(row['Grade'])
+        with timer.stage('upload'):
+            if data.empty:
+                core.log("No rows to upload")
+            elif upload_mode == 'async':
+                concurrency = config('UPLOAD_CONCURRENCY', default=8, cast=int)
+                asyncio.run(upload_rows_async(data, get_cnxn(), counts, concurrency=concurrency))
             else:
-                # For middle schools or missing grades, query from database
-                db_grade = get_grade_from_id(params['PID'], cnxn)
-                if db_grade is not None:
-                    params['GR'] = int(db_grade)
-                else:
-                    # Last resort: Skip this record
-                    core.log(f"WARNING: No grade found for student {params['PID']} ({row['First_Name']} {row['Last_Name']}), skipping record")
-                    skipped_count += 1
-                    continue  # Skip this student
-            
-            params['SR'] = row['Status']
-            params['SL'] = row['Status']
-            params['PF'] = row['Status']
-            params['TD'] = row['File_Date']
-            params['SCL'] = row['SC']
-            params['IN'] = '4RH' #row['Initials'] if notna(row.get('Initials')) else None
-            
-            core.log(f'Inserting record: {params}')
-            
-            try:
-                with cnxn.connect() as conn:
-                    conn.execute(text(sql.INSERT_HRN), params)
-                    conn.commit()
-                success_count += 1
-            except Exception as e:
-                core.log(f"ERROR inserting student {params['PID']} ({row['First_Name']} {row['Last_Name']}): {e}")
-                error_count += 1
-                continue  # Continue with next student
-        
+                upload_data(data, get_cnxn(), counts, upload_mode=upload_mode, batch_size=batch_size,
+                            commit_every=commit_every, workers=upload_workers)
+
         core.log(f"Done processing all files.")
-        core.log(f"Successfully inserted: {success_count}")
-        core.log(f"Skipped (no grade): {skipped_count}")
-        core.log(f"Duplicates (already uploaded): {duplicate_count}")
-        core.log(f"Errors: {error_count}")
+        core.log(f"Successfully inserted: {counts.success}")
+        core.log(f"Skipped (no grade): {counts.skipped}")
+        core.log(f"Duplicates (already uploaded): {counts.duplicate}")
+        core.log(f"Errors: {counts.error}")
         core.log(f"Total records processed: {len(data)}")
         core.log("=" * 80)
+        report['upload'] = {'mode': upload_mode, 'workers': upload_workers, 'success': counts.success,
+                            'skipped': counts.skipped, 'duplicate': counts.duplicate, 'error': counts.error}
+    
+    # Files are only skipped on later runs once every row was uploaded (see file_upload_outcome)
+    with timer.stage('record_manifest'):
+        rows_final = data.groupby('Source_File', observed=True).size() if not data.empty else Series(dtype=int)
+        invalid_by_file = (missing_id_rows.groupby('Source_File', observed=True).size()
+                           if not missing_id_rows.empty else Series(dtype=int))
+        for file in files:
+            file_rows = int(rows_final.get(file, 0))
+            if upload:
+                outcome = file_upload_outcome(rows_read[file], file_rows, int(invalid_by_file.get(file, 0)),
+                                              counts.by_file.get(file, {}))
+            else:
+                outcome = 'parsed'
+            record_manifest(manifest, file, rows_read[file], file_rows, outcome, sha256=digests[file],
+                            nurse_sha256=_nurse_info_sha256(nurse_info, file))
+        manifest.close()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Process 4RHearing roster workbooks in ./in and upload them to HRN.")
+    parser.add_argument('--parse-workers', type=int, default=config('PARSE_WORKERS', default=1, cast=int),
+                        help="Processes used to parse workbooks (default: 1, serial)")
+    parser.add_argument('--full', action='store_true',
+                        help="Process every workbook in ./in, ignoring the ingestion manifest")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    main(parse_workers=args.parse_workers, full=args.full)
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Offline regression tests for the HRN upload against the SQLite stand-in (local_db):
+SQ continuation, repeated students, duplicates already in HRN and within the run,
+the STU grade fallback, and per-workbook outcomes. Run from the repository root:
+
+    python -m pytest tests
+"""
+from datetime import datetime
+
+import pytest
+from pandas import DataFrame
+from sqlalchemy import text
+
+import local_db
+from main_4RHearing_upload import UploadCounts, apply_roster_dtypes, file_upload_outcome, upload_data
+
+TD1 = datetime(2024, 10, 1)
+TD2 = datetime(2025, 3, 12)
+TD3 = datetime(2025, 10, 17)
+
+# HRN rows present before the upload
+EXISTING_HRN = [
+    {'PID': 1001, 'SQ': 1, 'TD': TD1},
+    {'PID': 1001, 'SQ': 2, 'TD': TD2},
+]
+# STU grades for rows whose workbook has none
+STU_GRADES = {1003: 7}
+
+ROSTER_COLUMNS = ['Source_File', 'Student_ID', 'Grade', 'File_Date']
+ROSTER_ROWS = [
+    ('A.xlsx', 1001, 3, TD3),     # continues after the student's SQ 2
+    ('A.xlsx', 1001, 3, TD1),     # (PID, TD) already in HRN
+    ('A.xlsx', 1002, 4, TD1),     # new student ...
+    ('B.xlsx', 1002, 4, TD3),     # ... again on another date, in another workbook
+    ('B.xlsx', 1003, None, TD3),  # grade from STU
+    ('B.xlsx', 1003, None, TD3),  # same (PID, TD) twice in one run
+    ('B.xlsx', 1004, None, TD3),  # no grade anywhere: skipped
+]
+
+# Upload strategies that run on SQLite, as upload_data keyword arguments
+UPLOAD_MODES = {
+    'row': dict(upload_mode='row'),
+    'batch': dict(upload_mode='batch', batch_size=2),
+    'threaded': dict(upload_mode='row', workers=3),
+}
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = local_db.create_local_engine(str(tmp_path / 'aeries.sqlite'), fixtures_dir=None)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO HRN (PID, SQ, GR, SR, SL, PF, TD, SCL, [IN]) "
+                          "VALUES (:PID, :SQ, 3, 'P', 'P', 'P', :TD, 2, '4RH')"), EXISTING_HRN)
+    local_db.seed_students(engine, STU_GRADES)
+    yield engine
+    engine.dispose()
+
+def roster() -> DataFrame:
+    """ROSTER_ROWS as the filtered, typed frame _run hands to upload_data."""
+    df = DataFrame(ROSTER_ROWS, columns=ROSTER_COLUMNS)
+    df['Status'] = 'P'
+    df['First_Name'] = 'First'
+    df['Last_Name'] = 'Last'
+    df['SC'] = 2
+    df['School_Name'] = 'School'
+    return apply_roster_dtypes(df).drop(columns='ID_Error')
+
+def hrn_rows(engine) -> list:
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text("SELECT PID, SQ, GR, TD FROM HRN ORDER BY PID, SQ"))]
+
+@pytest.mark.parametrize('mode', list(UPLOAD_MODES))
+def test_upload_assigns_sq_and_skips_duplicates(engine, mode):
+    counts = UploadCounts()
+    upload_data(roster(), engine, counts, **UPLOAD_MODES[mode])
+
+    assert (counts.success, counts.duplicate, counts.skipped, counts.error) == (4, 2, 1, 0)
+    assert hrn_rows(engine) == [
+        (1001, 1, 3, TD1),
+        (1001, 2, 3, TD2),
+        (1001, 3, 3, TD3),
+        (1002, 1, 4, TD1),
+        (1002, 2, 4, TD3),
+        (1003, 1, 7, TD3),
+    ]
+
+@pytest.mark.parametrize('mode', list(UPLOAD_MODES))
+def test_upload_counts_per_workbook(engine, mode):
+    counts = UploadCounts()
+    upload_data(roster(), engine, counts, **UPLOAD_MODES[mode])
+
+    assert counts.by_file == {
+        'A.xlsx': {'success': 2, 'duplicate': 1, 'error': 0, 'skipped': 0},
+        'B.xlsx': {'success': 2, 'duplicate': 1, 'error': 0, 'skipped': 1},
+    }
+    assert file_upload_outcome(3, 3, 0, counts.by_file['A.xlsx']) == 'uploaded'
+    assert file_upload_outcome(4, 4, 0, counts.by_file['B.xlsx']) == 'partial'
+
+def test_unreadable_workbook_is_failed():
+    # A read error leaves no rows and nothing to upload, which must not count as uploaded
+    assert file_upload_outcome(0, 0, 0, {}) == 'failed'
+
+def test_rerun_inserts_nothing(engine):
+    upload_data(roster(), engine, UploadCounts())
+    counts = UploadCounts()
+    upload_data(roster(), engine, counts, upload_mode='batch')
+
+    assert (counts.success, counts.duplicate, counts.skipped, counts.error) == (0, 6, 1, 0)
+    assert len(hrn_rows(engine)) == 6